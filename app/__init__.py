@@ -3,7 +3,6 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_socketio import SocketIO
-from sqlalchemy import text
 import os
 
 # Initialize extensions
@@ -27,7 +26,10 @@ def create_app(config_name='default'):
     db.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
-    socketio.init_app(app, async_mode=app.config.get('SOCKETIO_ASYNC_MODE', 'eventlet'), cors_allowed_origins="*")
+    # Emits fan out through SOCKETIO_MESSAGE_QUEUE to every worker process
+    from app.socket_queue import queue_options
+    socketio.init_app(app, async_mode=app.config.get('SOCKETIO_ASYNC_MODE', 'eventlet'), cors_allowed_origins="*",
+                      **queue_options(app.config))
     
     # Configure login manager
     login_manager.login_view = 'auth.login'
@@ -36,8 +38,8 @@ def create_app(config_name='default'):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        from app.user_cache import load_cached_user
+        return load_cached_user(int(user_id))
     
     # Register blueprints
     from app.auth import auth_bp
@@ -49,6 +51,9 @@ def create_app(config_name='default'):
     from app.admin import admin_bp
     from app.payment_history import payment_history_bp
     from app.disputes import disputes_bp
+    from app.creators import creators_bp
+    from app.media import media_bp
+    from app.resumable import resumable_bp, init_resumable
     from app.oauth import oauth_bp, init_oauth
     
     app.register_blueprint(auth_bp)
@@ -60,6 +65,9 @@ def create_app(config_name='default'):
     app.register_blueprint(admin_bp)
     app.register_blueprint(payment_history_bp)
     app.register_blueprint(disputes_bp)
+    app.register_blueprint(creators_bp)
+    app.register_blueprint(media_bp)
+    app.register_blueprint(resumable_bp)
     app.register_blueprint(oauth_bp)
     
     # Register manual migration blueprint (for Render setup)
@@ -69,120 +77,57 @@ def create_app(config_name='default'):
     # Initialize OAuth
     init_oauth(app)
     
+    # Stale resumable upload cleanup command
+    init_resumable(app)
+    
     # Register SocketIO events
     from app import socket_events
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Auto-migrate: Add payment system columns
-        try:
-            # Delivery columns (existing)
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS delivery_link VARCHAR(500);"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS delivery_note TEXT;"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS delivered_at TIMESTAMP;"))
-            
-            # Payment columns for users
-            db.session.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS upi_id VARCHAR(100);"))
-            
-            # Payment confirmation columns for transactions
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS customer_confirmed BOOLEAN DEFAULT FALSE;"))
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS creator_confirmed BOOLEAN DEFAULT FALSE;"))
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS payment_confirmed_at TIMESTAMP;"))
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS payment_screenshot VARCHAR(500);"))
-            
-            # Create notifications table
-            db.session.execute(text("""
-                CREATE TABLE IF NOT EXISTS notifications (
-                    id SERIAL PRIMARY KEY,
-                    user_id INTEGER NOT NULL REFERENCES users(id),
-                    type VARCHAR(50) NOT NULL,
-                    title VARCHAR(200) NOT NULL,
-                    message TEXT NOT NULL,
-                    project_id INTEGER REFERENCES projects(id),
-                    transaction_id INTEGER REFERENCES transactions(id),
-                    is_read BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """))
-            
-            # PHASE 1: Project Management (Delete & Leave)
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleted_by_id INTEGER REFERENCES users(id);"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS deletion_reason VARCHAR(200);"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS creator_left BOOLEAN DEFAULT FALSE;"))
-            db.session.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS creator_left_at TIMESTAMP;"))
-            
-            # PHASE 2: Payment Screenshot Upload
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS screenshot_uploaded_at TIMESTAMP;"))
-            
-            # PHASE 4: Dispute Resolution
-            db.session.execute(text("""
-                CREATE TABLE IF NOT EXISTS disputes (
-                    id SERIAL PRIMARY KEY,
-                    transaction_id INTEGER REFERENCES transactions(id) NOT NULL,
-                    raised_by_id INTEGER REFERENCES users(id) NOT NULL,
-                    dispute_type VARCHAR(50) NOT NULL,
-                    description TEXT NOT NULL,
-                    evidence_files TEXT,
-                    status VARCHAR(20) DEFAULT 'open',
-                    resolution_notes TEXT,
-                    resolved_by_id INTEGER REFERENCES users(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    resolved_at TIMESTAMP
-                );
-            """))
-            
-            db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_disputes_transaction ON disputes(transaction_id);"))
-            db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_disputes_raised_by ON disputes(raised_by_id);"))
-            db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_disputes_status ON disputes(status);"))
-            
-            # PHASE 5: Google OAuth (More robust migration)
-            try:
-                # Check if google_id column exists
-                result = db.session.execute(text("""
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name='users' AND column_name='google_id'
-                """))
-                if not result.fetchone():
-                    db.session.execute(text("ALTER TABLE users ADD COLUMN google_id VARCHAR(255) UNIQUE;"))
-                    print("✅ Added google_id column")
-            except Exception as col_error:
-                print(f"⚠️ google_id column: {col_error}")
-            
-            try:
-                result = db.session.execute(text("""
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name='users' AND column_name='auth_provider'
-                """))
-                if not result.fetchone():
-                    db.session.execute(text("ALTER TABLE users ADD COLUMN auth_provider VARCHAR(20) DEFAULT 'email';"))
-                    print("✅ Added auth_provider column")
-            except Exception as col_error:
-                print(f"⚠️ auth_provider column: {col_error}")
-            
-            try:
-                result = db.session.execute(text("""
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name='users' AND column_name='profile_picture'
-                """))
-                if not result.fetchone():
-                    db.session.execute(text("ALTER TABLE users ADD COLUMN profile_picture VARCHAR(500);"))
-                    print("✅ Added profile_picture column")
-            except Exception as col_error:
-                print(f"⚠️ profile_picture column: {col_error}")
-            
-            try:
-                db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_users_google_id ON users(google_id);"))
-            except:
-                pass
-            
-            db.session.commit()
-            print("✅ Payment system migration successful!")
-            print("✅ Phase 1-5 migrations successful (including Google OAuth)!")
-        except Exception as e:
-            print(f"⚠️ Migration error: {e}")
-            db.session.rollback()
+    # Schema changes are applied by `python manage.py db upgrade` (migrations/),
+    # never at startup
+    
+    # Content-addressed upload storage backend
+    from app.storage import init_storage
+    init_storage(app)
+    
+    # Resized image copies and the srcset template filter
+    from app.thumbnails import init_thumbnails
+    init_thumbnails(app)
+    
+    # Green-thread friendly connection pool and pool statistics
+    from app.db_pool import init_db_pool
+    init_db_pool(app)
+    
+    # Daily metrics rollup maintained on write
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    # Creator rating aggregate maintained on write
+    from app.ratings import init_ratings
+    init_ratings(app)
     
+    # Creator directory stats and skills maintained on write
+    from app.creator_stats import init_creator_stats
+    init_creator_stats(app)
+    
+    # Full-text search index for project listings
+    from app.search import init_search
+    init_search(app)
+
+    # Cached users for load_user, dropped when a committed change touches them
+    from app.user_cache import init_user_cache
+    init_user_cache(app)
+    
+    # Landing page fragments, dropped when projects or listed creators change
+    from app.landing_cache import init_landing_cache
+    init_landing_cache(app)
+    
+    # Push notification counts once the writing transaction commits
+    from app.notification_helpers import init_notifications
+    init_notifications(app)
+
+    # Background job workers and `python manage.py worker`
+    from app.jobs import init_jobs
+    init_jobs(app)
+
     return app
@@ -3,8 +3,16 @@ from flask_login import login_required, current_user
 from datetime import datetime, timedelta
 from functools import wraps
 from sqlalchemy import func
+from sqlalchemy.orm import aliased
 from app import db
-from app.models import User, Project, Transaction, Application, Review, Dispute
+from app.models import User, Project, Transaction, Application, Dispute
+from app.analytics import time_series, ALLOWED_RANGES, GRANULARITIES
+from app.metrics import totals as metric_totals, days_ago
+from app.exports import apply_export_filters, csv_response, format_date
+from app.db_pool import pool_stats as db_pool_stats
+from app.socket_events import invalidate_project_access
+from app.ratings import rating_summary
+from app.storage import media_url
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -24,21 +32,23 @@ def admin_required(f):
 @admin_required
 def dashboard():
     """Admin dashboard"""
+    totals = metric_totals()
+    
     # User statistics
-    total_users = User.query.count()
-    total_customers = User.query.filter_by(role='customer').count()
-    total_creators = User.query.filter_by(role='creator').count()
-    active_users = User.query.filter_by(is_active=True).count()
+    total_users = totals['new_users']
+    total_customers = totals['new_customers']
+    total_creators = totals['new_creators']
+    active_users = totals['new_users'] - totals['users_deactivated']
     
     # Project statistics
-    total_projects = Project.query.count()
-    open_projects = Project.query.filter_by(status='open').count()
-    active_projects = Project.query.filter(Project.status.in_(['assigned', 'in_progress'])).count()
-    completed_projects = Project.query.filter_by(status='completed').count()
+    total_projects = totals['projects_created']
+    open_projects = totals['projects_open']
+    active_projects = totals['projects_active']
+    completed_projects = totals['projects_completed']
     
     # Transaction statistics
-    total_transactions = Transaction.query.filter_by(status='completed').count()
-    total_revenue = db.session.query(func.sum(Transaction.amount)).filter_by(status='completed').scalar() or 0
+    total_transactions = totals['transactions_completed']
+    total_revenue = totals['completed_amount']
     
     # Platform fee (assume 10%)
     platform_fee = total_revenue * 0.10
@@ -151,9 +161,8 @@ def user_details(user_id):
     
     total_spent = sum(t.amount for t in transactions if t.status == 'completed')
     
-    # Get reviews
-    reviews = Review.query.filter_by(creator_id=user.id).all() if user.role == 'creator' else []
-    avg_rating = sum(r.rating for r in reviews) / len(reviews) if reviews else 0
+    # Rating from the running aggregate
+    ratings = rating_summary(user.id)
     
     return jsonify({
         'success': True,
@@ -168,13 +177,14 @@ def user_details(user_id):
             'profile_image': user.profile_image or '/static/images/default-avatar.png',
             'bio': user.bio or 'No bio',
             'skills': user.skills or 'N/A',
-            'portfolio_url': user.portfolio_url or 'N/A'
+            'portfolio_url': url_for('projects.creator_profile', creator_id=user.id) if user.role == 'creator' else 'N/A'
         },
         'stats': {
             'total_projects': len(projects),
             'total_spent': total_spent,
-            'avg_rating': round(avg_rating, 1),
-            'total_reviews': len(reviews),
+            'avg_rating': round(ratings['average'], 1),
+            'total_reviews': ratings['total_reviews'],
+            'rating_histogram': ratings['histogram'],
             'total_transactions': len(transactions)
         },
         'projects': projects_data[:5],
@@ -266,36 +276,33 @@ def promote_to_admin(user_id):
 @admin_bp.route('/users/export')
 @admin_required
 def export_users():
-    """Export all users to CSV"""
-    import csv
-    from io import StringIO
-    from flask import make_response
-    
-    users = User.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    
-    # Header
-    writer.writerow(['ID', 'Name', 'Email', 'Role', 'Status', 'Admin', 'Joined'])
-    
-    # Data
-    for user in users:
-        writer.writerow([
-            user.id,
-            user.full_name,
-            user.email,
-            user.role,
-            'Active' if user.is_active else 'Banned',
-            'Yes' if user.is_admin else 'No',
-            user.created_at.strftime('%Y-%m-%d')
-        ])
-    
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=users_export.csv"
-    output.headers["Content-type"] = "text/csv"
+    """Stream users as CSV (filters: start, end, status=active|banned, role)"""
+    query = db.session.query(
+        User.id, User.full_name, User.email, User.role, User.is_active, User.is_admin, User.created_at
+    )
+    query = apply_export_filters(query, User.created_at)
     
-    return output
+    status = request.args.get('status')
+    if status in ('active', 'banned'):
+        query = query.filter(User.is_active.is_(status == 'active'))
+    role = request.args.get('role')
+    if role:
+        query = query.filter(User.role == role)
+    
+    return csv_response(
+        'users_export.csv',
+        ['ID', 'Name', 'Email', 'Role', 'Status', 'Admin', 'Joined'],
+        query.order_by(User.id),
+        lambda u: [
+            u.id,
+            u.full_name,
+            u.email,
+            u.role,
+            'Active' if u.is_active else 'Banned',
+            'Yes' if u.is_admin else 'No',
+            format_date(u.created_at)
+        ]
+    )
 
 
 @admin_bp.route('/projects')
@@ -448,11 +455,12 @@ def reassign_project(project_id):
     if new_creator.role != 'creator':
         return jsonify({'error': 'User must be a creator'}), 400
     
-    old_creator = project.assigned_to
+    old_creator = project.creator
     project.assigned_to_id = new_creator_id
     project.status = 'assigned'
     
     db.session.commit()
+    invalidate_project_access(project.id)
     
     flash(f'Project reassigned from {old_creator.full_name if old_creator else "None"} to {new_creator.full_name}', 'success')
     return jsonify({'success': True, 'message': 'Project reassigned'}), 200
@@ -461,37 +469,33 @@ def reassign_project(project_id):
 @admin_bp.route('/projects/export')
 @admin_required
 def export_projects():
-    """Export all projects to CSV"""
-    import csv
-    from io import StringIO
-    from flask import make_response
-    
-    projects = Project.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    
-    # Header
-    writer.writerow(['ID', 'Title', 'Budget', 'Status', 'Customer', 'Creator', 'Created', 'Deleted'])
-    
-    # Data
-    for p in projects:
-        writer.writerow([
+    """Stream projects as CSV (filters: start, end, status)"""
+    customer = aliased(User)
+    creator = aliased(User)
+    query = db.session.query(
+        Project.id, Project.title, Project.budget, Project.status,
+        customer.full_name.label('customer_name'),
+        creator.full_name.label('creator_name'),
+        Project.created_at, Project.deleted_at
+    ).join(customer, Project.posted_by_id == customer.id) \
+     .outerjoin(creator, Project.assigned_to_id == creator.id)
+    query = apply_export_filters(query, Project.created_at, Project.status)
+    
+    return csv_response(
+        'projects_export.csv',
+        ['ID', 'Title', 'Budget', 'Status', 'Customer', 'Creator', 'Created', 'Deleted'],
+        query.order_by(Project.id),
+        lambda p: [
             p.id,
             p.title,
             p.budget,
             p.status,
-            p.posted_by.full_name,
-            p.assigned_to.full_name if p.assigned_to else 'Not assigned',
-            p.created_at.strftime('%Y-%m-%d'),
+            p.customer_name,
+            p.creator_name or 'Not assigned',
+            format_date(p.created_at),
             'Yes' if p.deleted_at else 'No'
-        ])
-    
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=projects_export.csv"
-    output.headers["Content-type"] = "text/csv"
-    
-    return output
+        ]
+    )
 
 
 @admin_bp.route('/transactions')
@@ -551,7 +555,7 @@ def transaction_details(transaction_id):
             'payment_confirmed_at': txn.payment_confirmed_at.strftime('%Y-%m-%d %H:%M') if txn.payment_confirmed_at else 'N/A',
             'customer_confirmed': txn.customer_confirmed,
             'creator_confirmed': txn.creator_confirmed,
-            'payment_screenshot': txn.payment_screenshot
+            'payment_screenshot': media_url(txn.payment_screenshot) or None
         },
         'project': {
             'id': txn.project.id,
@@ -626,38 +630,36 @@ def release_escrow(transaction_id):
 @admin_bp.route('/transactions/export')
 @admin_required
 def export_transactions():
-    """Export all transactions to CSV"""
-    import csv
-    from io import StringIO
-    from flask import make_response
-    
-    transactions = Transaction.query.all()
-    
-    si = StringIO()
-    writer = csv.writer(si)
-    
-    # Header
-    writer.writerow(['ID', 'Amount', 'Status', 'Project', 'Customer', 'Creator', 'Date', 'Customer Confirmed', 'Creator Confirmed'])
-    
-    # Data
-    for txn in transactions:
-        writer.writerow([
-            txn.id,
-            txn.amount,
-            txn.status,
-            txn.project.title,
-            txn.customer.full_name,
-            txn.creator.full_name,
-            txn.created_at.strftime('%Y-%m-%d'),
-            'Yes' if txn.customer_confirmed else 'No',
-            'Yes' if txn.creator_confirmed else 'No'
-        ])
-    
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=transactions_export.csv"
-    output.headers["Content-type"] = "text/csv"
-    
-    return output
+    """Stream transactions as CSV (filters: start, end, status)"""
+    customer = aliased(User)
+    creator = aliased(User)
+    query = db.session.query(
+        Transaction.id, Transaction.amount, Transaction.status,
+        Project.title.label('project_title'),
+        customer.full_name.label('customer_name'),
+        creator.full_name.label('creator_name'),
+        Transaction.created_at, Transaction.customer_confirmed, Transaction.creator_confirmed
+    ).join(Project, Transaction.project_id == Project.id) \
+     .join(customer, Transaction.customer_id == customer.id) \
+     .join(creator, Transaction.creator_id == creator.id)
+    query = apply_export_filters(query, Transaction.created_at, Transaction.status)
+    
+    return csv_response(
+        'transactions_export.csv',
+        ['ID', 'Amount', 'Status', 'Project', 'Customer', 'Creator', 'Date', 'Customer Confirmed', 'Creator Confirmed'],
+        query.order_by(Transaction.id),
+        lambda t: [
+            t.id,
+            t.amount,
+            t.status,
+            t.project_title,
+            t.customer_name,
+            t.creator_name,
+            format_date(t.created_at),
+            'Yes' if t.customer_confirmed else 'No',
+            'Yes' if t.creator_confirmed else 'No'
+        ]
+    )
 
 
 # ========== DISPUTE MANAGEMENT ==========
@@ -869,64 +871,33 @@ def ban_from_dispute(dispute_id, user_id):
 @admin_required
 def analytics():
     """Analytics dashboard with charts"""
-    from datetime import timedelta
+    days = request.args.get('days', 30, type=int)
+    if days not in ALLOWED_RANGES:
+        days = 30
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        granularity = 'day'
     
     # Summary stats
-    total_users = User.query.count()
-    total_projects = Project.query.count()
-    active_projects = Project.query.filter(Project.status.in_(['assigned', 'in_progress'])).count()
-    total_revenue = db.session.query(func.sum(Transaction.amount)).filter_by(status='completed').scalar() or 0
-    avg_project_value = db.session.query(func.avg(Project.budget)).scalar() or 0
+    totals = metric_totals()
+    total_users = totals['new_users']
+    total_projects = totals['projects_created']
+    active_projects = totals['projects_active']
+    total_revenue = totals['completed_amount']
+    avg_project_value = (totals['project_budget_total'] / total_projects) if total_projects > 0 else 0
     platform_earnings = total_revenue * 0.10
     
-    # Growth calculations (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    users_last_month = User.query.filter(User.created_at >= thirty_days_ago).count()
-    users_previous_month = total_users - users_last_month
-    user_growth = ((users_last_month / users_previous_month) * 100) if users_previous_month > 0 else 0
-    
-    revenue_last_month = db.session.query(func.sum(Transaction.amount)).filter(
-        Transaction.status == 'completed',
-        Transaction.created_at >= thirty_days_ago
-    ).scalar() or 0
-    revenue_previous_month = total_revenue - revenue_last_month
-    revenue_growth = ((revenue_last_month / revenue_previous_month) * 100) if revenue_previous_month > 0 else 0
-    
-    # User growth data (last 30 days)
-    user_growth_labels = []
-    user_growth_data = []
-    for i in range(30, -1, -1):
-        date = datetime.utcnow() - timedelta(days=i)
-        count = User.query.filter(func.date(User.created_at) == date.date()).count()
-        user_growth_labels.append(date.strftime('%b %d'))
-        user_growth_data.append(count)
-    
-    # Revenue data (last 30 days)
-    revenue_labels = []
-    revenue_data = []
-    for i in range(30, -1, -1):
-        date = datetime.utcnow() - timedelta(days=i)
-        amount = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.status == 'completed',
-            func.date(Transaction.created_at) == date.date()
-        ).scalar() or 0
-        revenue_labels.append(date.strftime('%b %d'))
-        revenue_data.append(float(amount))
-    
-    # Project activity data
-    project_labels = []
-    projects_created = []
-    projects_completed = []
-    for i in range(30, -1, -1):
-        date = datetime.utcnow() - timedelta(days=i)
-        created = Project.query.filter(func.date(Project.created_at) == date.date()).count()
-        completed = Project.query.filter(
-            func.date(Project.created_at) == date.date(),
-            Project.status == 'completed'
-        ).count()
-        project_labels.append(date.strftime('%b %d'))
-        projects_created.append(created)
-        projects_completed.append(completed)
+    # Daily series for the selected window (one grouped query per metric)
+    series = time_series(days, granularity)
+    
+    # Growth calculations over the selected window
+    users_last_period = sum(series['user_growth_data'])
+    users_previous_period = total_users - users_last_period
+    user_growth = ((users_last_period / users_previous_period) * 100) if users_previous_period > 0 else 0
+    
+    revenue_last_period = sum(series['revenue_data'])
+    revenue_previous_period = total_revenue - revenue_last_period
+    revenue_growth = ((revenue_last_period / revenue_previous_period) * 100) if revenue_previous_period > 0 else 0
     
     # Category breakdown
     category_data_raw = db.session.query(
@@ -974,15 +945,15 @@ def analytics():
     } for user, count, earned in top_creators_raw]
     
     # Platform stats
-    completed_projects = Project.query.filter_by(status='completed').count()
+    completed_projects = totals['projects_completed']
     success_rate = (completed_projects / total_projects * 100) if total_projects > 0 else 0
     
     # Avg completion time
     avg_completion_days = 14  # TODO: Calculate from actual data
     
     # Dispute rate
-    total_disputes = Dispute.query.count()
-    total_transactions = Transaction.query.count()
+    total_disputes = totals['disputes_opened']
+    total_transactions = totals['transactions_created']
     dispute_rate = (total_disputes / total_transactions * 100) if total_transactions > 0 else 0
     
     return render_template(
@@ -995,20 +966,16 @@ def analytics():
         active_projects=active_projects,
         avg_project_value=avg_project_value,
         platform_earnings=platform_earnings,
-        user_growth_labels=user_growth_labels,
-        user_growth_data=user_growth_data,
-        revenue_labels=revenue_labels,
-        revenue_data=revenue_data,
-        project_labels=project_labels,
-        projects_created=projects_created,
-        projects_completed=projects_completed,
+        days=days,
+        granularity=granularity,
         category_labels=category_labels,
         category_data=category_data,
         top_customers=top_customers,
         top_creators=top_creators,
         success_rate=success_rate,
         avg_completion_days=avg_completion_days,
-        dispute_rate=dispute_rate
+        dispute_rate=dispute_rate,
+        **series
     )
 
 
@@ -1029,9 +996,10 @@ def export_analytics():
     writer.writerow(['Metric', 'Value'])
     
     # Data
-    total_users = User.query.count()
-    total_projects = Project.query.count()
-    total_revenue = db.session.query(func.sum(Transaction.amount)).filter_by(status='completed').scalar() or 0
+    totals = metric_totals()
+    total_users = totals['new_users']
+    total_projects = totals['projects_created']
+    total_revenue = totals['completed_amount']
     
     writer.writerow(['Total Users', total_users])
     writer.writerow(['Total Projects', total_projects])
@@ -1051,15 +1019,21 @@ def export_analytics():
 @admin_required
 def settings():
     """Platform settings"""
-    total_fees = db.session.query(func.sum(Transaction.amount * 0.10)).filter_by(status='completed').scalar() or 0
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    month_fees = db.session.query(func.sum(Transaction.amount * 0.10)).filter(
-        Transaction.status == 'completed', Transaction.created_at >= thirty_days_ago
-    ).scalar() or 0
-    escrow_amount = db.session.query(func.sum(Transaction.amount)).filter_by(status='escrow').scalar() or 0
+    totals = metric_totals()
+    total_fees = totals['completed_amount'] * 0.10
+    month_fees = metric_totals(since=days_ago(30))['completed_amount'] * 0.10
+    # Pending UPI payments are the money held in escrow
+    escrow_amount = totals['pending_amount']
     return render_template('admin/settings.html', total_fees=total_fees, month_fees=month_fees, escrow_amount=escrow_amount)
 
 
+@admin_bp.route('/pool-stats')
+@admin_required
+def pool_stats():
+    """Database connection pool statistics for this worker process"""
+    return jsonify(db_pool_stats())
+
+
 # ========== AUDIT LOGS ==========
 
 audit_logs = []
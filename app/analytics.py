@@ -0,0 +1,77 @@
+"""Time-bucketed aggregation helpers for admin analytics
+
+Series are read from the daily_metrics rollup (one row per day) and folded
+into week or month buckets in Python, so the cost depends on the size of
+the range rather than on the size of the base tables.
+"""
+from datetime import datetime, timedelta
+from app.metrics import daily_rows
+
+ALLOWED_RANGES = (7, 30, 90, 365)
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def _bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_label(day, granularity):
+    if granularity == 'week':
+        return f"Week of {day.strftime('%b %d')}"
+    if granularity == 'month':
+        return day.strftime('%b %Y')
+    return day.strftime('%b %d')
+
+
+def date_range(days, end=None):
+    """Return (start_date, end_date) covering the last `days` days inclusive"""
+    end = end or datetime.utcnow().date()
+    return end - timedelta(days=days), end
+
+
+def bucket_series(daily_values, start, end, granularity='day', series_count=1):
+    """Fold {date: tuple_of_values} into ordered labels and per-series lists.
+
+    Days missing from `daily_values` count as zero.
+    """
+    buckets = {}
+    day = start
+    while day <= end:
+        key = _bucket_start(day, granularity)
+        totals = buckets.setdefault(key, [0] * series_count)
+        for i, value in enumerate(daily_values.get(day, ())):
+            totals[i] += value or 0
+        day += timedelta(days=1)
+
+    keys = sorted(buckets)
+    labels = [_bucket_label(k, granularity) for k in keys]
+    series = [[buckets[k][i] for k in keys] for i in range(series_count)]
+    return labels, series
+
+
+def time_series(days=30, granularity='day'):
+    """Compute every analytics chart series for the requested window"""
+    start, end = date_range(days)
+    rows = daily_rows(start, end)
+    daily_values = {
+        day: (row.new_users, row.completed_amount, row.projects_created, row.projects_completed)
+        for day, row in rows.items()
+    }
+
+    labels, (user_data, revenue_data, created, completed) = bucket_series(
+        daily_values, start, end, granularity, series_count=4
+    )
+
+    return {
+        'user_growth_labels': labels,
+        'user_growth_data': user_data,
+        'revenue_labels': labels,
+        'revenue_data': [float(v) for v in revenue_data],
+        'project_labels': labels,
+        'projects_created': created,
+        'projects_completed': completed,
+    }
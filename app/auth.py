@@ -1,9 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.utils import secure_filename
-import os
 from app import db
-from app.models import User, Upload
+from app.models import User
+from app.storage import save_upload
+from app.thumbnails import avatar_url, queue_thumbnails
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -127,33 +127,7 @@ def profile_setup():
             files = request.files.getlist('portfolio_files')
             for file in files:
                 if file and file.filename and allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
-                    filename = secure_filename(file.filename)
-                    # Add timestamp to avoid collisions
-                    from datetime import datetime
-                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                    filename = f"{current_user.id}_{timestamp}_{filename}"
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    
-                    # Determine file type
-                    ext = filename.rsplit('.', 1)[1].lower()
-                    if ext in ['jpg', 'jpeg', 'png', 'gif']:
-                        file_type = 'image'
-                    elif ext in ['mp4', 'mov', 'avi']:
-                        file_type = 'video'
-                    else:
-                        file_type = 'document'
-                    
-                    # Create Upload record
-                    upload = Upload(
-                        owner_id=current_user.id,
-                        file_path=f'/static/uploads/{filename}',
-                        file_type=file_type,
-                        file_size=os.path.getsize(filepath),
-                        original_filename=file.filename,
-                        upload_type='portfolio'
-                    )
-                    db.session.add(upload)
+                    queue_thumbnails(save_upload(file, current_user.id, 'portfolio'))
         
         db.session.commit()
         flash('Profile setup complete!', 'success')
@@ -167,8 +141,6 @@ def profile_setup():
 def profile():
     """View and edit user profile"""
     if request.method == 'POST':
-        from flask import current_app
-        
         current_user.full_name = request.form.get('full_name', current_user.full_name)
         current_user.location = request.form.get('location', current_user.location)
         
@@ -184,13 +156,9 @@ def profile():
         if 'profile_image' in request.files:
             file = request.files['profile_image']
             if file and file.filename and allowed_file(file.filename, {'png', 'jpg', 'jpeg', 'gif'}):
-                filename = secure_filename(file.filename)
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                filename = f"profile_{current_user.id}_{timestamp}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                current_user.profile_image = f'/static/uploads/{filename}'
+                upload = save_upload(file, current_user.id, 'profile')
+                current_user.profile_image = avatar_url(upload)
+                queue_thumbnails(upload)
         
         db.session.commit()
         flash('Profile updated successfully!', 'success')
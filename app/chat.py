@@ -1,11 +1,24 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import Project, Message
+from app.models import Project, Message, User
+from app.message_helpers import get_total_unread, get_unread_counts, mark_project_read
 from datetime import datetime
+import base64
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
 
+
+@chat_bp.app_context_processor
+def chat_badge():
+    """Navbar unread message total, queried only when a template calls it"""
+    def chat_unread_total():
+        if not current_user.is_authenticated:
+            return 0
+        return get_total_unread(current_user.id)
+    return {'chat_unread_total': chat_unread_total}
+
+
 @chat_bp.route('/<int:project_id>')
 @login_required
 def room(project_id):
@@ -24,31 +37,123 @@ def room(project_id):
     else:
         other_user = project.customer
     
+    # Opening the room reads everything the other participant sent
+    mark_project_read(project_id, current_user.id)
+    
     return render_template('chat/room.html', project=project, other_user=other_user)
 
 
+@chat_bp.route('/api/unread')
+@login_required
+def unread_counts():
+    """Get unread message counts for all of the user's projects"""
+    counts = get_unread_counts(current_user.id)
+    return jsonify({
+        'total': sum(counts.values()),
+        'projects': {str(project_id): count for project_id, count in counts.items()}
+    })
+
+
+@chat_bp.route('/api/read/<int:project_id>', methods=['POST'])
+@login_required
+def mark_read(project_id):
+    """Mark a project's messages as read while the chat is open"""
+    project = Project.query.get_or_404(project_id)
+    
+    if current_user.id not in [project.posted_by_id, project.assigned_to_id]:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    mark_project_read(project_id, current_user.id)
+    return jsonify({'success': True})
+
+
+def encode_cursor(message):
+    """Opaque keyset cursor for a message (base64 of created_at and id)"""
+    raw = f'{message.created_at.isoformat()}|{message.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, or None if it is malformed"""
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
 @chat_bp.route('/api/messages/<int:project_id>')
 @login_required
 def get_messages(project_id):
-    """Get message history for a project"""
+    """Get a page of message history for a project.
+
+    Without a cursor the newest page is returned. `before` pages towards
+    older messages and `after` towards newer ones; messages are always
+    returned oldest first.
+    """
+    from flask import current_app
+    
     project = Project.query.get_or_404(project_id)
     
     # Check authorization
     if current_user.id not in [project.posted_by_id, project.assigned_to_id]:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    messages = Message.query.filter_by(project_id=project_id).order_by(Message.created_at.asc()).all()
+    per_page = current_app.config.get('MESSAGES_PER_PAGE', 50)
+    limit = max(1, min(request.args.get('limit', per_page, type=int), per_page * 4))
+    before = request.args.get('before')
+    after = request.args.get('after')
+    
+    # Sender name and avatar come from the same query
+    query = db.session.query(Message, User.full_name, User.profile_image).join(
+        User, Message.sender_id == User.id
+    ).filter(Message.project_id == project_id)
+    
+    if after:
+        cursor = decode_cursor(after)
+        if not cursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(db.or_(
+            Message.created_at > cursor[0],
+            db.and_(Message.created_at == cursor[0], Message.id > cursor[1])
+        )).order_by(Message.created_at.asc(), Message.id.asc())
+    else:
+        if before:
+            cursor = decode_cursor(before)
+            if not cursor:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(db.or_(
+                Message.created_at < cursor[0],
+                db.and_(Message.created_at == cursor[0], Message.id < cursor[1])
+            ))
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not after:
+        rows.reverse()
     
     messages_data = []
-    for msg in messages:
+    for msg, sender_name, sender_image in rows:
         messages_data.append({
             'id': msg.id,
+            'client_id': msg.client_id,
             'sender_id': msg.sender_id,
-            'sender_name': msg.sender.full_name,
+            'sender_name': sender_name,
+            'sender_image': sender_image or '/static/images/default-avatar.png',
             'content': msg.content,
             'attachments': msg.attachments,
             'created_at': msg.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'is_own': msg.sender_id == current_user.id
         })
     
-    return jsonify(messages_data)
+    first = rows[0][0] if rows else None
+    last = rows[-1][0] if rows else None
+    return jsonify({
+        'messages': messages_data,
+        'before': encode_cursor(first) if first and (has_more or after) else None,
+        'after': encode_cursor(last) if last else after,
+        'has_more': has_more
+    })
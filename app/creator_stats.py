@@ -0,0 +1,288 @@
+"""Precomputed creator directory data
+
+creator_stats holds per-creator numbers the directory filters and ranks
+on, and creator_skills holds User.skills split into one indexed row per
+skill. A session flush hook keeps completed project counts and skills
+current on write. Chat response times (how long the assigned creator
+takes to answer the customer) are recomputed by the periodic
+`creators.refresh_stats` task (hourly, see app/tasks.py);
+`python manage.py refresh-creator-stats` also recounts everything else
+after manual data fixes. Both upsert row by row, so they never drop
+the flush hook's concurrent updates.
+
+Rating and review counts are not copied here; the directory reads them
+from users.rating / users.total_reviews (see app/ratings.py). The rating
+hook does keep creator_stats.rank_score, the indexed default ranking of
+the directory, current on every review.
+"""
+import json
+from collections import Counter
+from datetime import datetime
+import click
+from sqlalchemy import event, func, inspect
+from app import db
+from app.models import CreatorSkill, CreatorStats, Message, Project, User
+
+SKILL_MAX_LENGTH = 50
+
+
+# Bayesian average for the default ranking: a few reviews pull a creator
+# towards PRIOR_RATING instead of straight to the top
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5
+
+
+def rank_score(rating_sum, review_count):
+    """Default directory ranking score for a creator's review totals"""
+    return (rating_sum + PRIOR_RATING * PRIOR_REVIEWS) / (review_count + PRIOR_REVIEWS)
+
+
+def parse_skills(skills):
+    """Normalized, de-duplicated skill names from a User.skills value"""
+    if not skills:
+        return []
+    values = None
+    if skills.lstrip().startswith('['):
+        try:
+            values = json.loads(skills)
+        except ValueError:
+            pass
+    if not isinstance(values, list):
+        values = skills.split(',')
+
+    seen = []
+    for value in values:
+        skill = str(value).strip().lower()[:SKILL_MAX_LENGTH]
+        if skill and skill not in seen:
+            seen.append(skill)
+    return seen
+
+
+def _change(obj, attr):
+    """Return (old, new) for a modified attribute, or None if unchanged"""
+    history = inspect(obj).attrs[attr].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def collect_changes(session):
+    """Completed project deltas, changed skills and new creators for the flush that just ran.
+
+    Returns ({creator_id: delta}, {creator_id: skills or None}, {creator_id}).
+    """
+    completed = Counter()
+    skills = {}
+    creators = set()
+
+    for obj in session.new:
+        if isinstance(obj, Project):
+            if obj.status == 'completed' and obj.assigned_to_id:
+                completed[obj.assigned_to_id] += 1
+        elif isinstance(obj, User) and obj.role == 'creator':
+            creators.add(obj.id)
+            if obj.skills:
+                skills[obj.id] = obj.skills
+
+    for obj in session.dirty:
+        if isinstance(obj, Project):
+            status = _change(obj, 'status')
+            assignee = _change(obj, 'assigned_to_id')
+            if not status and not assignee:
+                continue
+            old_status = status[0] if status else obj.status
+            old_assignee = assignee[0] if assignee else obj.assigned_to_id
+            if old_status == 'completed' and old_assignee:
+                completed[old_assignee] -= 1
+            if obj.status == 'completed' and obj.assigned_to_id:
+                completed[obj.assigned_to_id] += 1
+        elif isinstance(obj, User):
+            role = _change(obj, 'role')
+            if role and obj.role == 'creator':
+                creators.add(obj.id)
+            if role or _change(obj, 'skills'):
+                skills[obj.id] = obj.skills if obj.role == 'creator' else None
+
+    return {k: v for k, v in completed.items() if v}, skills, creators
+
+
+# Column values for a new creator_stats row
+STATS_DEFAULTS = {'completed_projects': 0, 'response_count': 0, 'response_seconds_total': 0, 'rank_score': PRIOR_RATING}
+
+
+def _add_completed(connection, creator_id, delta):
+    """Add to a creator's completed count, creating the stats row if needed"""
+    table = CreatorStats.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(creator_id=creator_id, **{**STATS_DEFAULTS, 'completed_projects': delta})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['creator_id'],
+            set_={'completed_projects': table.c.completed_projects + stmt.excluded.completed_projects}
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        table.update().where(table.c.creator_id == creator_id).values(
+            completed_projects=table.c.completed_projects + delta
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(creator_id=creator_id, **{**STATS_DEFAULTS, 'completed_projects': delta}))
+
+
+def _replace_skills(connection, creator_id, skills):
+    table = CreatorSkill.__table__
+    connection.execute(table.delete().where(table.c.creator_id == creator_id))
+    rows = [{'creator_id': creator_id, 'skill': skill} for skill in parse_skills(skills)]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def _after_flush(session, flush_context):
+    completed, skills, creators = collect_changes(session)
+    if not completed and not skills and not creators:
+        return
+
+    connection = session.connection()
+    # Every creator gets a stats row, so the directory can join it
+    upsert_stats(connection, [{'creator_id': creator_id} for creator_id in creators])
+    for creator_id, delta in completed.items():
+        _add_completed(connection, creator_id, delta)
+    for creator_id, value in skills.items():
+        _replace_skills(connection, creator_id, value)
+
+
+def _seconds_between(later, earlier):
+    """Seconds between two datetime expressions, per dialect"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.extract('epoch', later - earlier)
+    return (func.julianday(later) - func.julianday(earlier)) * 86400
+
+
+def response_times():
+    """{creator_id: (replies, total seconds)} for replies by the assigned creator to the customer"""
+    window = {'partition_by': Message.project_id, 'order_by': (Message.created_at, Message.id)}
+    ordered = db.session.query(
+        Message.project_id.label('project_id'),
+        Message.sender_id.label('sender_id'),
+        Message.created_at.label('created_at'),
+        func.lag(Message.sender_id).over(**window).label('previous_sender_id'),
+        func.lag(Message.created_at).over(**window).label('previous_created_at')
+    ).subquery()
+
+    rows = db.session.query(
+        ordered.c.sender_id,
+        func.count(),
+        func.sum(_seconds_between(ordered.c.created_at, ordered.c.previous_created_at))
+    ).join(Project, Project.id == ordered.c.project_id).filter(
+        ordered.c.sender_id == Project.assigned_to_id,
+        ordered.c.previous_sender_id == Project.posted_by_id
+    ).group_by(ordered.c.sender_id).all()
+
+    return {creator_id: (count, float(total or 0)) for creator_id, count, total in rows}
+
+
+def upsert_stats(connection, rows):
+    """Insert or update creator_stats rows; only the columns present in `rows` are overwritten"""
+    if not rows:
+        return
+    table = CreatorStats.__table__
+    columns = [column for column in rows[0] if column != 'creator_id']
+    rows = [{**STATS_DEFAULTS, **row} for row in rows]
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        if columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['creator_id'],
+                set_={column: stmt.excluded[column] for column in columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['creator_id'])
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        exists = connection.execute(
+            db.select(table.c.creator_id).where(table.c.creator_id == row['creator_id'])
+        ).first()
+        if exists is None:
+            connection.execute(table.insert().values(**row))
+        elif columns:
+            connection.execute(
+                table.update().where(table.c.creator_id == row['creator_id']).values(
+                    **{column: row[column] for column in columns}
+                )
+            )
+
+
+def refresh_response_times():
+    """Recompute every creator's chat response time (caller commits). Returns the number of creators."""
+    now = datetime.utcnow()
+    creator_ids = [creator_id for (creator_id,) in db.session.query(User.id).filter(User.role == 'creator')]
+    times = response_times()
+
+    rows = []
+    for creator_id in set(creator_ids) | set(times):
+        count, seconds = times.get(creator_id, (0, 0.0))
+        rows.append({
+            'creator_id': creator_id,
+            'response_count': count,
+            'response_seconds_total': seconds,
+            'avg_response_seconds': seconds / count if count else None,
+            'responses_updated_at': now
+        })
+    # Row by row upserts: completed counts kept by the flush hook are left alone
+    upsert_stats(db.session.connection(), rows)
+    return len(rows)
+
+
+def refresh():
+    """Recount completed projects and skills from the base tables and refresh response times.
+
+    For repairs after manual data fixes; the response times alone are
+    refreshed periodically by the `creators.refresh_stats` task.
+    Returns the number of creators.
+    """
+    creators = db.session.query(User.id, User.skills).filter(User.role == 'creator').all()
+    completed = dict(db.session.query(Project.assigned_to_id, func.count(Project.id)).filter(
+        Project.status == 'completed',
+        Project.assigned_to_id.isnot(None)
+    ).group_by(Project.assigned_to_id).all())
+
+    creator_ids = {creator_id for creator_id, _ in creators} | set(completed)
+    connection = db.session.connection()
+    upsert_stats(connection, [{'creator_id': creator_id, 'completed_projects': completed.get(creator_id, 0)}
+                              for creator_id in creator_ids])
+
+    for creator_id, skills in creators:
+        _replace_skills(connection, creator_id, skills)
+
+    refresh_response_times()
+    db.session.commit()
+    return len(creator_ids)
+
+
+def init_creator_stats(app):
+    """Register the flush hook and the refresh command"""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+
+    @app.cli.command('refresh-creator-stats')
+    def refresh_creator_stats_command():
+        """Recompute creator directory stats, skills and response times"""
+        click.echo(f'Refreshed stats for {refresh()} creators')
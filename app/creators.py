@@ -0,0 +1,164 @@
+from flask import Blueprint, jsonify, request, url_for
+from sqlalchemy import and_, func, or_
+from app import db
+from app.models import CreatorSkill, CreatorStats, User
+from app.creator_stats import parse_skills
+
+creators_bp = Blueprint('creators', __name__, url_prefix='/creators')
+
+SORTS = ('rank', 'rating', 'reviews', 'completed', 'response', 'newest')
+
+
+def _csv_arg(name):
+    value = request.args.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def directory_query():
+    """Active creators with their stats, filtered by the request arguments"""
+    # Every creator has a stats row (app/creator_stats.py)
+    completed = CreatorStats.completed_projects
+    query = db.session.query(User, completed, CreatorStats.avg_response_seconds, CreatorStats.rank_score).join(
+        CreatorStats, CreatorStats.creator_id == User.id
+    ).filter(User.role == 'creator', User.is_active == True)
+
+    domains = _csv_arg('domain')
+    if domains:
+        query = query.filter(User.domain.in_(domains))
+
+    # Every requested skill must match
+    skills = parse_skills(request.args.get('skills'))
+    if skills:
+        matching = db.session.query(CreatorSkill.creator_id).filter(
+            CreatorSkill.skill.in_(skills)
+        ).group_by(CreatorSkill.creator_id).having(func.count(CreatorSkill.skill) == len(skills))
+        query = query.filter(User.id.in_(matching.scalar_subquery()))
+
+    # Prefix match served by idx_users_location (text_pattern_ops on Postgres)
+    location = request.args.get('location', '').strip().lower()
+    if location:
+        query = query.filter(func.lower(User.location).like(f'{_escape_like(location)}%', escape='\\'))
+
+    min_rating = request.args.get('min_rating', type=float)
+    if min_rating:
+        query = query.filter(User.rating >= min_rating)
+
+    min_reviews = request.args.get('min_reviews', type=int)
+    if min_reviews:
+        query = query.filter(User.total_reviews >= min_reviews)
+
+    min_completed = request.args.get('min_completed', type=int)
+    if min_completed:
+        query = query.filter(CreatorStats.completed_projects >= min_completed)
+
+    return query, completed
+
+
+def ranked(query, completed, sort):
+    """Order directory results; User.id breaks ties so pages are stable"""
+    reviews = func.coalesce(User.total_reviews, 0)
+    rating = func.coalesce(User.rating, 0)
+
+    if sort == 'rating':
+        order = [rating.desc(), reviews.desc()]
+    elif sort == 'reviews':
+        order = [reviews.desc(), rating.desc()]
+    elif sort == 'completed':
+        order = [completed.desc(), rating.desc()]
+    elif sort == 'response':
+        # Creators without measured replies go last
+        order = [CreatorStats.avg_response_seconds.is_(None), CreatorStats.avg_response_seconds.asc()]
+    elif sort == 'newest':
+        order = [User.created_at.desc()]
+    else:
+        # Indexed (rank_score, creator_id): see after_cursor()
+        return query.order_by(CreatorStats.rank_score.desc(), CreatorStats.creator_id.desc())
+    return query.order_by(*order, User.id.desc())
+
+
+def parse_cursor(value):
+    """(rank_score, creator_id) from a `score:id` cursor, or None if malformed"""
+    try:
+        score, creator_id = value.split(':')
+        return float(score), int(creator_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def after_cursor(query, cursor):
+    """Keyset pagination for the default ranking: creators ranked after `cursor`"""
+    score, creator_id = cursor
+    return query.filter(or_(
+        CreatorStats.rank_score < score,
+        and_(CreatorStats.rank_score == score, CreatorStats.creator_id < creator_id)
+    ))
+
+
+@creators_bp.route('/api')
+def directory():
+    """Search creators.
+
+    Filters: domain (comma separated), skills (comma separated, all must
+    match), location (prefix), min_rating, min_reviews, min_completed.
+    sort is one of rank (default), rating, reviews, completed, response
+    or newest. The default ranking pages with the `next_cursor` of the
+    previous response passed as cursor; the other sorts take page.
+    """
+    from flask import current_app
+
+    sort = request.args.get('sort', 'rank')
+    if sort not in SORTS:
+        return jsonify({'error': f'sort must be one of {", ".join(SORTS)}'}), 400
+
+    per_page = current_app.config.get('CREATORS_PER_PAGE', 24)
+    limit = max(1, min(request.args.get('limit', per_page, type=int), per_page * 4))
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    query, completed = directory_query()
+    query = ranked(query, completed, sort)
+
+    if sort == 'rank':
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor = parse_cursor(cursor)
+            if cursor is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = after_cursor(query, cursor)
+    else:
+        query = query.offset((page - 1) * limit)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    creators = []
+    for creator, completed_projects, avg_response_seconds, _ in rows:
+        creators.append({
+            'id': creator.id,
+            'full_name': creator.full_name,
+            'profile_image': creator.profile_image or '/static/images/default-avatar.png',
+            'domain': creator.domain,
+            'location': creator.location,
+            'skills': parse_skills(creator.skills),
+            'rating': creator.rating or 0,
+            'total_reviews': creator.total_reviews or 0,
+            'completed_projects': completed_projects,
+            'avg_response_hours': round(avg_response_seconds / 3600, 1) if avg_response_seconds is not None else None,
+            'profile_url': url_for('projects.creator_profile', creator_id=creator.id)
+        })
+
+    response = {
+        'creators': creators,
+        'has_more': has_more
+    }
+    if sort == 'rank':
+        last_creator, _, _, last_score = rows[-1] if rows else (None, None, None, None)
+        response['next_cursor'] = f'{last_score!r}:{last_creator.id}' if has_more else None
+    else:
+        response['page'] = page
+    return jsonify(response)
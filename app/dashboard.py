@@ -1,8 +1,9 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from sqlalchemy import func
 from datetime import datetime, timedelta
 from app.models import Project, Application, Transaction, User, Message
+from app.message_helpers import get_unread_counts
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -15,35 +16,49 @@ def customer_dashboard():
         return redirect(url_for('main.index'))
     
     from app import db
+    from flask import current_app
     
-    # Posted projects with transactions
-    projects = Project.query.filter_by(posted_by_id=current_user.id).filter(
+    page = request.args.get('page', 1, type=int)
+    per_page = current_app.config.get('PROJECTS_PER_PAGE', 12)
+    
+    # Posted projects, one page at a time
+    my_projects = Project.query.filter_by(posted_by_id=current_user.id).filter(
         Project.deleted_at == None
-    ).order_by(Project.created_at.desc()).all()
+    )
+    pagination = my_projects.order_by(Project.created_at.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    projects = pagination.items
     
-    # Get transactions for each project
+    # Transactions for the projects on this page in a single IN query
     project_transactions = {}
-    for project in projects:
-        trans = Transaction.query.filter_by(project_id=project.id).first()
-        if trans:
-            project_transactions[project.id] = trans
-    
-    # Statistics
-    total_projects = len(projects)
-    active_projects = len([p for p in projects if p.status in ['open', 'assigned', 'in_progress']])
-    completed_projects = len([p for p in projects if p.status == 'completed'])
-    
-    # Total spent
-    total_spent = db.session.query(func.sum(Transaction.amount)).filter_by(
-        customer_id=current_user.id,
-        status='completed'
-    ).scalar() or 0
-    
-    # Pending payment (money in escrow)
-    pending_payment = db.session.query(func.sum(Transaction.amount)).filter_by(
-        customer_id=current_user.id,
-        status='pending'
-    ).scalar() or 0
+    if projects:
+        page_transactions = Transaction.query.filter(
+            Transaction.project_id.in_([p.id for p in projects])
+        ).order_by(Transaction.id.asc()).all()
+        for trans in page_transactions:
+            project_transactions.setdefault(trans.project_id, trans)
+    
+    # Statistics (one grouped query over all of the customer's projects)
+    status_counts = dict(
+        db.session.query(Project.status, func.count(Project.id)).filter(
+            Project.posted_by_id == current_user.id,
+            Project.deleted_at == None
+        ).group_by(Project.status).all()
+    )
+    total_projects = sum(status_counts.values())
+    active_projects = sum(status_counts.get(s, 0) for s in ['open', 'assigned', 'in_progress'])
+    completed_projects = status_counts.get('completed', 0)
+    
+    # Total spent and pending payment (money in escrow) in one grouped query
+    amounts = dict(
+        db.session.query(Transaction.status, func.sum(Transaction.amount)).filter(
+            Transaction.customer_id == current_user.id,
+            Transaction.status.in_(['completed', 'pending'])
+        ).group_by(Transaction.status).all()
+    )
+    total_spent = amounts.get('completed') or 0
+    pending_payment = amounts.get('pending') or 0
     
     # Recent transactions
     recent_transactions = Transaction.query.filter_by(customer_id=current_user.id).order_by(Transaction.created_at.desc()).limit(5).all()
@@ -51,6 +66,7 @@ def customer_dashboard():
     return render_template(
         'dashboard/customer.html',
         projects=projects,
+        pagination=pagination,
         project_transactions=project_transactions,
         total_projects=total_projects,
         active_projects=active_projects,
@@ -112,22 +128,19 @@ def creator_dashboard():
         status='completed'
     ).order_by(Transaction.created_at.desc()).limit(5).all()
     
-    # Unread messages count
-    unread_messages = 0
-    for job in active_jobs:
-        unread = Message.query.filter_by(
-            project_id=job.id,
-            is_read=False
-        ).filter(Message.sender_id != current_user.id).count()
-        unread_messages += unread
+    # Unread messages per job (one grouped query)
+    unread_counts = get_unread_counts(current_user.id, [job.id for job in active_jobs])
+    unread_messages = sum(unread_counts.values())
     
-    # Get transactions for delivered jobs (for payment status)
+    # Get transactions for delivered jobs (for payment status) in one IN query
     job_transactions = {}
-    for job in active_jobs:
-        if job.status == 'delivered':
-            trans = Transaction.query.filter_by(project_id=job.id).first()
-            if trans:
-                job_transactions[job.id] = trans
+    delivered_ids = [job.id for job in active_jobs if job.status == 'delivered']
+    if delivered_ids:
+        delivered_transactions = Transaction.query.filter(
+            Transaction.project_id.in_(delivered_ids)
+        ).order_by(Transaction.id.asc()).all()
+        for trans in delivered_transactions:
+            job_transactions.setdefault(trans.project_id, trans)
     
     return render_template(
         'dashboard/creator.html',
@@ -139,5 +152,6 @@ def creator_dashboard():
         total_earnings=total_earnings,
         pending_earnings=pending_earnings,
         recent_earnings=recent_earnings,
-        unread_messages=unread_messages
+        unread_messages=unread_messages,
+        unread_counts=unread_counts
     )
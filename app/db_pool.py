@@ -0,0 +1,71 @@
+"""Database connection pool setup and statistics
+
+Production keeps a QueuePool of Postgres connections per worker process
+(see config.engine_options). Under eventlet two things make that safe:
+gunicorn's eventlet worker monkey-patches threading, so the pool's locks
+yield to other green threads, and psycopg2 is switched to its green wait
+callback here, so a query in flight no longer blocks the whole hub.
+"""
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from app import db
+
+# Per-process pool event counters
+_events = Counter()
+
+
+def _make_psycopg_green():
+    try:
+        from eventlet.support import psycopg2_patcher
+        psycopg2_patcher.make_psycopg_green()
+        return True
+    except ImportError:
+        return False
+
+
+def _count(name):
+    def listener(*args):
+        _events[name] += 1
+    return listener
+
+
+_listeners = {name: _count(name) for name in ('connect', 'checkout', 'checkin', 'invalidate')}
+
+
+def init_db_pool(app):
+    """Make the Postgres driver eventlet-friendly and start counting pool events"""
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.driver == 'psycopg2' and app.config.get('SOCKETIO_ASYNC_MODE') == 'eventlet':
+        if not _make_psycopg_green():
+            print("⚠️ eventlet psycopg2 support unavailable, queries will block the worker")
+
+    for name, listener in _listeners.items():
+        if not event.contains(engine.pool, name, listener):
+            event.listen(engine.pool, name, listener)
+
+
+def pool_stats():
+    """Snapshot of this process's connection pool"""
+    pool = db.engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'connections_opened': _events['connect'],
+        'checkouts': _events['checkout'],
+        'checkins': _events['checkin'],
+        'invalidated': _events['invalidate'],
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'timeout': pool.timeout(),
+        })
+    # Share of checkouts served by an already-open connection
+    if stats['checkouts']:
+        stats['reuse_ratio'] = round(1 - stats['connections_opened'] / stats['checkouts'], 3)
+    return stats
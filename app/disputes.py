@@ -3,7 +3,8 @@ from flask_login import login_required, current_user
 from datetime import datetime
 from app import db
 from app.models import Dispute, Transaction, Project, User
-from app.notification_helpers import create_notification
+from app.jobs import enqueue
+from app.notification_helpers import notify_later
 
 disputes_bp = Blueprint('disputes', __name__, url_prefix='/dispute')
 
@@ -33,28 +34,25 @@ def create_dispute(transaction_id):
         status='open'
     )
     db.session.add(dispute)
-    db.session.commit()
     
-    # Notify the other party
+    # Notify the other party and the admins from the background worker
     other_user_id = transaction.creator_id if current_user.id == transaction.customer_id else transaction.customer_id
-    create_notification(
-        user_id=other_user_id,
+    notify_later([{
+        'user_id': other_user_id,
+        'notification_type': 'dispute_raised',
+        'title': '⚠️ Dispute Raised',
+        'message': f'A dispute has been raised for project "{transaction.project.title}". Type: {dispute_type}',
+        'transaction_id': transaction_id
+    }])
+    enqueue(
+        'notifications.admins',
         notification_type='dispute_raised',
-        title='⚠️ Dispute Raised',
-        message=f'A dispute has been raised for project "{transaction.project.title}". Type: {dispute_type}',
+        title='⚠️ New Dispute Reported',
+        message=f'Dispute raised for project "{transaction.project.title}" by {current_user.full_name}',
         transaction_id=transaction_id
     )
     
-    # Notify admin (user_id=1, assuming first user is admin)
-    admin_user = User.query.filter_by(role='admin').first()
-    if admin_user:
-        create_notification(
-            user_id=admin_user.id,
-            notification_type='dispute_raised',
-            title='⚠️ New Dispute Reported',
-            message=f'Dispute raised for project "{transaction.project.title}" by {current_user.full_name}',
-            transaction_id=transaction_id
-        )
+    db.session.commit()
     
     flash('Dispute raised successfully. Admin will review and contact you.', 'info')
     return jsonify({'success': True})
@@ -109,18 +107,17 @@ def resolve_dispute(dispute_id):
     dispute.resolution_notes = resolution_notes
     dispute.resolved_by_id = current_user.id
     dispute.resolved_at = datetime.utcnow()
-    db.session.commit()
     
     # Notify both parties
     transaction = dispute.transaction
-    for user_id in [transaction.customer_id, transaction.creator_id]:
-        create_notification(
-            user_id=user_id,
-            notification_type='dispute_resolved',
-            title='✅ Dispute Resolved',
-            message=f'Your dispute for "{transaction.project.title}" has been resolved by admin.',
-            transaction_id=transaction.id
-        )
+    notify_later({
+        'user_id': user_id,
+        'notification_type': 'dispute_resolved',
+        'title': '✅ Dispute Resolved',
+        'message': f'Your dispute for "{transaction.project.title}" has been resolved by admin.',
+        'transaction_id': transaction.id
+    } for user_id in [transaction.customer_id, transaction.creator_id])
+    db.session.commit()
     
     flash('Dispute resolved successfully', 'success')
     return jsonify({'success': True})
@@ -0,0 +1,211 @@
+"""Database-backed background jobs
+
+`enqueue()` adds a Job row to the caller's transaction, so a job exists
+exactly when the change that needs it is committed. Workers claim ready
+jobs with a conditional UPDATE (safe with several workers and processes),
+run the registered task and retry failures with exponential backoff.
+
+Tasks registered with `every=` are periodic: workers queue them when none
+is pending, and each finished run (done or finally failed) queues the
+next one `every` seconds later.
+
+Web processes start JOB_WORKERS workers (greenlets under eventlet, threads
+otherwise) when they serve their first request. Set JOB_WORKERS=0 and run
+`python manage.py worker` to process jobs in a separate process instead.
+"""
+import json
+import threading
+import traceback
+from datetime import datetime, timedelta
+import click
+from app import db, socketio
+from app.models import Job
+
+# Registered task name -> callable, filled by @task in app/tasks.py
+TASKS = {}
+# Periodic task name -> seconds between runs
+PERIODIC = {}
+
+RETRY_BASE_SECONDS = 5
+STALE_AFTER = timedelta(minutes=10)
+
+_workers_started = False
+_workers_lock = threading.Lock()
+
+
+def task(name, every=None):
+    """Register a function as a background task, run every `every` seconds if given"""
+    def decorator(func):
+        TASKS[name] = func
+        if every:
+            PERIODIC[name] = every
+        return func
+    return decorator
+
+
+def enqueue(task_name, run_at=None, max_attempts=5, **payload):
+    """Add a job to the current transaction (caller commits). Payload must be JSON serializable."""
+    if task_name not in TASKS:
+        raise KeyError(f'Unknown task: {task_name}')
+    job = Job(
+        task=task_name,
+        payload=json.dumps(payload),
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts
+    )
+    db.session.add(job)
+    return job
+
+
+def _pending(task_name, exclude_id=None):
+    """True if a job for `task_name` is queued or running"""
+    query = db.session.query(Job.id).filter(Job.task == task_name, Job.status.in_(('queued', 'running')))
+    if exclude_id is not None:
+        query = query.filter(Job.id != exclude_id)
+    return query.first() is not None
+
+
+def schedule_periodic():
+    """Queue every periodic task without a pending job. Returns the number queued."""
+    queued = 0
+    for task_name in PERIODIC:
+        if not _pending(task_name):
+            enqueue(task_name)
+            queued += 1
+    db.session.commit()
+    return queued
+
+
+def claim_next(now=None):
+    """Claim the next ready job for this worker, or return None"""
+    now = now or datetime.utcnow()
+    candidates = db.session.query(Job.id).filter(
+        Job.status == 'queued',
+        Job.run_at <= now
+    ).order_by(Job.run_at, Job.id).limit(5).all()
+
+    for (job_id,) in candidates:
+        # Only one worker can flip a given row from queued to running
+        claimed = Job.query.filter_by(id=job_id, status='queued').update({
+            Job.status: 'running',
+            Job.attempts: Job.attempts + 1,
+            Job.locked_at: now
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return Job.query.get(job_id)
+
+    db.session.commit()
+    return None
+
+
+def run_job(job):
+    """Run a claimed job; returns True on success"""
+    job_id = job.id
+    try:
+        func = TASKS.get(job.task)
+        if func is None:
+            raise LookupError(f'Unknown task: {job.task}')
+        func(**json.loads(job.payload or '{}'))
+
+        # Task work, completion and the next periodic run are committed together
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        if job.task in PERIODIC and not _pending(job.task, exclude_id=job.id):
+            enqueue(job.task, run_at=job.finished_at + timedelta(seconds=PERIODIC[job.task]))
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        job = Job.query.get(job_id)
+        job.last_error = traceback.format_exc(limit=5)
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            print(f"❌ Job {job.id} ({job.task}) failed after {job.attempts} attempts")
+            # Keep periodic tasks going
+            if job.task in PERIODIC and not _pending(job.task, exclude_id=job.id):
+                enqueue(job.task, run_at=job.finished_at + timedelta(seconds=PERIODIC[job.task]))
+        else:
+            delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            print(f"⚠️ Job {job.id} ({job.task}) failed, retrying in {delay}s")
+        db.session.commit()
+        return False
+
+
+def requeue_stale(now=None):
+    """Put back jobs whose worker died while running them"""
+    now = now or datetime.utcnow()
+    count = Job.query.filter(
+        Job.status == 'running',
+        Job.locked_at < now - STALE_AFTER
+    ).update({Job.status: 'queued', Job.locked_at: None}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def work(poll_interval=1.0, burst=False):
+    """Process jobs until stopped; with burst=True return once the queue is empty.
+
+    Must run inside an app context. Returns the number of jobs processed.
+    """
+    processed = 0
+    requeue_stale()
+    schedule_periodic()
+    while True:
+        try:
+            job = claim_next()
+            if job is not None:
+                run_job(job)
+                processed += 1
+                continue
+        except Exception as e:
+            print(f"⚠️ Job worker error: {e}")
+            db.session.rollback()
+
+        if burst:
+            return processed
+        # Release the connection while idle
+        db.session.remove()
+        socketio.sleep(poll_interval)
+
+
+def _worker_loop(app):
+    with app.app_context():
+        work(poll_interval=app.config.get('JOB_POLL_INTERVAL', 1.0))
+
+
+def start_workers(app):
+    """Start the in-process workers once per process"""
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return
+        _workers_started = True
+    for _ in range(app.config.get('JOB_WORKERS', 1)):
+        socketio.start_background_task(_worker_loop, app)
+
+
+def init_jobs(app):
+    """Register tasks, the lazy in-process worker start and the worker command"""
+    from app import tasks  # noqa: F401 - registers @task functions
+
+    if app.config.get('JOB_WORKERS', 1) > 0:
+        @app.before_request
+        def _start_job_workers():
+            if not _workers_started:
+                start_workers(app)
+
+    @app.cli.command('worker')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    @click.option('--poll-interval', default=None, type=float, help='Seconds between polls when idle.')
+    def worker_command(burst, poll_interval):
+        """Run background jobs"""
+        interval = poll_interval or app.config.get('JOB_POLL_INTERVAL', 1.0)
+        click.echo('Job worker started' + (' (burst mode)' if burst else ''))
+        processed = work(poll_interval=interval, burst=burst)
+        click.echo(f'Processed {processed} jobs')
@@ -0,0 +1,102 @@
+"""Cached fragments of the public landing page
+
+main.index keeps its query results (featured creators, recent projects,
+category counts) and, for anonymous visitors, the whole rendered page in
+this per-process cache for LANDING_CACHE_TTL seconds. Committed changes
+that show up on the page drop the cache straight away: new or edited
+projects, and users whose rating, activation, role or public profile
+changed. Other worker processes catch up at expiry.
+"""
+import threading
+import time
+from sqlalchemy import event, inspect
+from app import db
+from app.models import Project, User
+
+PENDING_INVALIDATION = 'landing_cache_stale'
+
+# User columns rendered on the landing page or deciding who is listed
+USER_FIELDS = {'role', 'is_active', 'domain', 'rating', 'total_reviews', 'full_name', 'profile_image'}
+
+# key -> (expires_at, value)
+_entries = {}
+_lock = threading.Lock()
+_ttl = 60
+
+
+def get_or_set(key, compute):
+    """Cached value for `key`, computed and stored on a miss"""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    value = compute()
+    if _ttl > 0:
+        with _lock:
+            _entries[key] = (now + _ttl, value)
+    return value
+
+
+def get(key):
+    with _lock:
+        entry = _entries.get(key)
+    return entry[1] if entry and entry[0] > time.monotonic() else None
+
+
+def store(key, value):
+    if _ttl > 0:
+        with _lock:
+            _entries[key] = (time.monotonic() + _ttl, value)
+
+
+def invalidate():
+    """Drop every cached landing fragment in this process"""
+    with _lock:
+        _entries.clear()
+
+
+def invalidate_on_commit():
+    """Drop the cache once the current transaction commits (for bulk UPDATEs)"""
+    db.session.info[PENDING_INVALIDATION] = True
+
+
+def _affects_landing(obj):
+    if isinstance(obj, Project):
+        return True
+    if isinstance(obj, User):
+        state = inspect(obj)
+        if state.pending or state.deleted:
+            return True
+        return any(state.attrs[field].history.has_changes() for field in USER_FIELDS)
+    return False
+
+
+def _before_flush(session, flush_context, instances):
+    if session.info.get(PENDING_INVALIDATION):
+        return
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if _affects_landing(obj):
+            session.info[PENDING_INVALIDATION] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop(PENDING_INVALIDATION, None):
+        invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_INVALIDATION, None)
+
+
+def init_landing_cache(app):
+    """Set the TTL and register the invalidation hooks"""
+    global _ttl
+    _ttl = app.config.get('LANDING_CACHE_TTL', 60)
+
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -1,12 +1,16 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, session
+from flask_login import current_user
+from app import db, landing_cache
 from app.models import User, Project
 from sqlalchemy import func
 
 main_bp = Blueprint('main', __name__)
 
-@main_bp.route('/')
-def index():
-    """Landing page"""
+CATEGORIES = ['graphic_design', 'video_editing', 'photography', 'videography']
+
+
+def landing_data():
+    """Query results for the landing page, as plain values safe to cache"""
     # Get featured creators (top rated)
     featured_creators = User.query.filter_by(
         role='creator',
@@ -18,19 +22,48 @@ def index():
         status='open'
     ).order_by(Project.created_at.desc()).limit(6).all()
     
-    # Category stats
-    categories = ['graphic_design', 'video_editing', 'photography', 'videography']
-    category_stats = {}
-    for cat in categories:
-        count = User.query.filter_by(role='creator', domain=cat, is_active=True).count()
-        category_stats[cat] = count
+    # Category stats, one grouped query
+    counts = dict(db.session.query(User.domain, func.count(User.id)).filter(
+        User.role == 'creator',
+        User.is_active == True,
+        User.domain.in_(CATEGORIES)
+    ).group_by(User.domain).all())
+    
+    return {
+        'featured_creators': [{
+            'id': creator.id,
+            'full_name': creator.full_name,
+            'profile_image': creator.profile_image,
+            'domain': creator.domain,
+            'rating': creator.rating,
+            'total_reviews': creator.total_reviews
+        } for creator in featured_creators],
+        'recent_projects': [{
+            'id': project.id,
+            'title': project.title,
+            'category': project.category,
+            'budget': project.budget,
+            'created_at': project.created_at
+        } for project in recent_projects],
+        'category_stats': {cat: counts.get(cat, 0) for cat in CATEGORIES}
+    }
+
+
+@main_bp.route('/')
+def index():
+    """Landing page"""
+    # Anonymous visitors with nothing flashed all get the same page
+    shared_page = not current_user.is_authenticated and not session.get('_flashes')
+    if shared_page:
+        html = landing_cache.get('index.html')
+        if html is not None:
+            return html
+    
+    html = render_template('index.html', **landing_cache.get_or_set('index.data', landing_data))
     
-    return render_template(
-        'index.html',
-        featured_creators=featured_creators,
-        recent_projects=recent_projects,
-        category_stats=category_stats
-    )
+    if shared_page:
+        landing_cache.store('index.html', html)
+    return html
 
 
 @main_bp.route('/about')
@@ -0,0 +1,68 @@
+"""Serving stored uploads
+
+Blobs in local storage (app/storage.py) are served from /media/<key>.
+Keys are content hashes, so a URL never changes meaning: responses carry
+the hash as a strong ETag and a year-long immutable Cache-Control, and
+Range requests are answered with 206 partial content so video players
+can seek without downloading the whole file.
+
+MEDIA_SENDFILE hands the transfer to a front proxy instead of the worker:
+
+- x-accel-redirect (nginx): X-Accel-Redirect to MEDIA_ACCEL_PREFIX + key,
+  an `internal` location aliased to the blob directory
+- x-sendfile (Apache mod_xsendfile, lighttpd): X-Sendfile with the file path
+
+The proxy then handles Range itself; the app still answers If-None-Match
+with a 304.
+"""
+import mimetypes
+import os
+import re
+from flask import Blueprint, abort, current_app, request, send_file
+from app.storage import get_backend
+
+media_bp = Blueprint('media', __name__, url_prefix='/media')
+
+KEY_PATTERN = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})(\.[a-z0-9]{1,10})?$')
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _offloaded(key, path, mode, sha256):
+    """Empty response telling the front proxy which file to send"""
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    response = current_app.response_class(mimetype=mimetype)
+    if mode == 'x-accel-redirect':
+        prefix = current_app.config.get('MEDIA_ACCEL_PREFIX', '/_media/')
+        response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{key}"
+    else:
+        response.headers['X-Sendfile'] = path
+    response.set_etag(sha256)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('MEDIA_MAX_AGE', ONE_YEAR)
+    response.cache_control.immutable = True
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        # Some proxies send the file anyway if the header is left in
+        response.headers.pop('X-Accel-Redirect', None)
+        response.headers.pop('X-Sendfile', None)
+    return response
+
+
+@media_bp.route('/<path:key>')
+def serve(key):
+    """A stored blob, with Range support and immutable caching"""
+    match = KEY_PATTERN.match(key)
+    path = get_backend().path(key) if match else None
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    sha256 = match.group(3)
+    mode = current_app.config.get('MEDIA_SENDFILE')
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        return _offloaded(key, path, mode, sha256)
+
+    # send_file answers If-None-Match and Range (206) itself
+    response = send_file(path, etag=sha256, conditional=True, max_age=current_app.config.get('MEDIA_MAX_AGE', ONE_YEAR))
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,142 @@
+"""Write-behind persistence for chat messages
+
+Socket handlers broadcast a message straight away under the id the
+sending client generated, then hand it to this buffer. Buffered messages
+are written with one multi-row INSERT and one commit per batch, either
+when CHAT_BATCH_SIZE messages are waiting or CHAT_FLUSH_INTERVAL seconds
+after the first one arrived. Once a batch is committed the project room
+gets a `messages_saved` event mapping client ids to database ids; the
+sender gets `message_failed` for anything that could not be stored and
+keeps it to resend.
+
+With CHAT_WRITE_BEHIND off, save_now() commits each message before it
+is broadcast, as the chat used to.
+"""
+import threading
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db, socketio
+from app.models import Message
+
+# Buffered entries: {'row': insert values, 'sid': sender connection, 'room': project room}
+_pending = []
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+
+def buffer_message(row, sid, room):
+    """Queue a message for the next batch insert"""
+    global _flush_scheduled
+    app = current_app._get_current_object()
+    with _pending_lock:
+        _pending.append({'row': row, 'sid': sid, 'room': room})
+        full = len(_pending) >= app.config.get('CHAT_BATCH_SIZE', 50)
+        schedule = not full and not _flush_scheduled
+        if schedule:
+            _flush_scheduled = True
+
+    if full:
+        flush()
+    elif schedule:
+        socketio.start_background_task(_flush_later, app)
+
+
+def _flush_later(app):
+    socketio.sleep(app.config.get('CHAT_FLUSH_INTERVAL', 0.005))
+    with app.app_context():
+        flush()
+
+
+def flush():
+    """Write everything buffered so far. Must run inside an app context."""
+    global _flush_scheduled
+    with _pending_lock:
+        batch = list(_pending)
+        _pending.clear()
+        _flush_scheduled = False
+    if not batch:
+        return 0
+
+    saved, failed = _insert(batch)
+    _acknowledge(saved, failed)
+    return len(saved)
+
+
+def save_now(row, sid, room):
+    """Synchronously store one message; returns its id, or None if it failed"""
+    entry = {'row': row, 'sid': sid, 'room': room}
+    saved, failed = _insert([entry])
+    _acknowledge(saved, failed)
+    return saved[0][1] if saved else None
+
+
+def _key(row):
+    return row['sender_id'], row['client_id']
+
+
+def _insert(batch):
+    """Insert a batch in one statement, falling back to row by row. Returns (saved, failed)."""
+    statement = Message.__table__.insert().returning(Message.id, Message.sender_id, Message.client_id)
+
+    # The same message resent within one batch is only inserted once
+    unique = {}
+    for entry in batch:
+        unique.setdefault(_key(entry['row']), entry['row'])
+    rows = list(unique.values())
+    try:
+        ids = {(sender_id, client_id): message_id
+               for message_id, sender_id, client_id in db.session.execute(statement, rows)}
+        db.session.commit()
+        return [(entry, ids[_key(entry['row'])]) for entry in batch], []
+    except Exception as e:
+        db.session.rollback()
+        if len(rows) == 1 and not isinstance(e, IntegrityError):
+            print(f"⚠️ Could not save chat message: {e}")
+            return [], batch
+
+    # A resent message or a deleted project spoils the whole statement;
+    # save the rest one at a time
+    saved, failed = [], []
+    for entry in batch:
+        try:
+            message_id = db.session.execute(statement, [entry['row']]).first()[0]
+            db.session.commit()
+            saved.append((entry, message_id))
+        except IntegrityError:
+            db.session.rollback()
+            existing = _existing_id(entry['row'])
+            if existing:
+                saved.append((entry, existing))
+            else:
+                failed.append(entry)
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Could not save chat message: {e}")
+            failed.append(entry)
+    return saved, failed
+
+
+def _existing_id(row):
+    """Id of an already stored message with the same sender and client id"""
+    return db.session.query(Message.id).filter_by(
+        sender_id=row['sender_id'],
+        client_id=row['client_id']
+    ).scalar()
+
+
+def _acknowledge(saved, failed):
+    """Tell clients which messages are durable and which were lost"""
+    by_room = {}
+    for entry, message_id in saved:
+        by_room.setdefault(entry['room'], []).append({
+            'client_id': entry['row']['client_id'],
+            'id': message_id
+        })
+    for room, messages in by_room.items():
+        socketio.emit('messages_saved', {'messages': messages}, room=room)
+
+    for entry in failed:
+        socketio.emit('message_failed', {
+            'project_id': entry['row']['project_id'],
+            'client_id': entry['row']['client_id']
+        }, to=entry['sid'])
@@ -0,0 +1,42 @@
+"""Helper functions for unread chat message counters"""
+from sqlalchemy import func
+from app import db
+from app.models import Message, Project
+
+def get_unread_counts(user_id, project_ids=None):
+    """Get {project_id: unread count} for a user in one grouped query.
+
+    Only messages sent by the other participant count as unread. When
+    project_ids is None, every project the user posted or is assigned to
+    is included.
+    """
+    query = db.session.query(Message.project_id, func.count(Message.id)).filter(
+        Message.is_read == False,
+        Message.sender_id != user_id
+    )
+
+    if project_ids is None:
+        my_projects = db.session.query(Project.id).filter(
+            (Project.posted_by_id == user_id) | (Project.assigned_to_id == user_id)
+        )
+        query = query.filter(Message.project_id.in_(my_projects.scalar_subquery()))
+    else:
+        if not project_ids:
+            return {}
+        query = query.filter(Message.project_id.in_(list(project_ids)))
+
+    return dict(query.group_by(Message.project_id).all())
+
+def get_total_unread(user_id, project_ids=None):
+    """Get total unread messages across a user's projects"""
+    return sum(get_unread_counts(user_id, project_ids).values())
+
+def mark_project_read(project_id, user_id):
+    """Mark every message from the other participant in a project as read"""
+    updated = Message.query.filter(
+        Message.project_id == project_id,
+        Message.sender_id != user_id,
+        Message.is_read == False
+    ).update({Message.is_read: True}, synchronize_session=False)
+    db.session.commit()
+    return updated
@@ -0,0 +1,280 @@
+"""Daily platform metrics rollup
+
+A session flush hook turns inserts, edits and deletes on users, projects,
+transactions and disputes into per-day counter deltas and upserts them into
+daily_metrics in the same transaction. Admin pages then sum a few rows per
+day instead of scanning the base tables.
+
+Bulk statements (query.update() / query.delete()) and database-level
+cascades bypass the session; run `python manage.py rebuild-metrics` to
+recompute the table from the base tables after those or manual data fixes.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, date, timedelta
+import click
+from sqlalchemy import event, func, inspect
+from app import db
+from app.models import DailyMetric, User, Project, Transaction, Dispute
+
+COUNTER_COLUMNS = [
+    'new_users', 'new_customers', 'new_creators', 'users_deactivated',
+    'projects_created', 'projects_open', 'projects_active', 'projects_completed', 'project_budget_total',
+    'transactions_created', 'transactions_completed', 'completed_amount', 'pending_amount', 'refunded_amount',
+    'disputes_opened', 'disputes_resolved',
+]
+
+# Project status -> net counter column
+PROJECT_STATUS_COLUMNS = {
+    'open': 'projects_open',
+    'assigned': 'projects_active',
+    'in_progress': 'projects_active',
+    'completed': 'projects_completed',
+}
+
+# Transaction status -> net amount column
+TRANSACTION_AMOUNT_COLUMNS = {
+    'completed': 'completed_amount',
+    'pending': 'pending_amount',
+    'refunded': 'refunded_amount',
+}
+
+
+def _as_date(value):
+    """func.date() returns strings on SQLite and dates on Postgres"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _change(obj, attr):
+    """Return (old, new) for a modified attribute, or None if unchanged"""
+    history = inspect(obj).attrs[attr].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _committed(obj, attr):
+    """Value of `attr` as last loaded from the database"""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def _project_status(delta, status, sign):
+    column = PROJECT_STATUS_COLUMNS.get(status)
+    if column:
+        delta[column] += sign
+
+
+def _transaction_status(delta, status, amount, sign):
+    column = TRANSACTION_AMOUNT_COLUMNS.get(status)
+    if column:
+        delta[column] += sign * (amount or 0)
+    if status == 'completed':
+        delta['transactions_completed'] += sign
+
+
+def _role(delta, role, sign):
+    if role in ('customer', 'creator'):
+        delta[f'new_{role}s'] += sign
+
+
+def _count_row(delta, obj, sign, value):
+    """Add (sign 1) or remove (sign -1) everything a row contributes, reading columns with `value`"""
+    if isinstance(obj, User):
+        delta['new_users'] += sign
+        _role(delta, value(obj, 'role'), sign)
+        if value(obj, 'is_active') is False:
+            delta['users_deactivated'] += sign
+    elif isinstance(obj, Project):
+        delta['projects_created'] += sign
+        delta['project_budget_total'] += sign * (value(obj, 'budget') or 0)
+        _project_status(delta, value(obj, 'status') or 'open', sign)
+    elif isinstance(obj, Transaction):
+        delta['transactions_created'] += sign
+        _transaction_status(delta, value(obj, 'status') or 'pending', value(obj, 'amount'), sign)
+    elif isinstance(obj, Dispute):
+        delta['disputes_opened'] += sign
+        if value(obj, 'status') == 'resolved':
+            delta['disputes_resolved'] += sign
+
+
+def collect_deltas(session):
+    """Compute {day: {column: delta}} for the pending flush.
+
+    New rows count on their created_at day (today unless set explicitly),
+    and so do hard deletes and edits to what a row was created with (user
+    role, project budget, transaction amount). Status changes count on the
+    day they happen.
+    """
+    today = datetime.utcnow().date()
+    deltas = defaultdict(Counter)
+    tracked = (User, Project, Transaction, Dispute)
+
+    for obj in session.new:
+        if isinstance(obj, tracked):
+            _count_row(deltas[_as_date(obj.created_at) or today], obj, 1, getattr)
+
+    for obj in session.deleted:
+        if isinstance(obj, tracked):
+            _count_row(deltas[_as_date(_committed(obj, 'created_at')) or today], obj, -1, _committed)
+
+    delta = deltas[today]
+    for obj in session.dirty:
+        if not isinstance(obj, tracked):
+            continue
+        created = deltas[_as_date(obj.created_at) or today]
+        if isinstance(obj, User):
+            change = _change(obj, 'is_active')
+            if change and bool(change[0]) != bool(change[1]):
+                delta['users_deactivated'] += -1 if change[1] else 1
+            change = _change(obj, 'role')
+            if change:
+                _role(created, change[0], -1)
+                _role(created, change[1], 1)
+        elif isinstance(obj, Project):
+            change = _change(obj, 'status')
+            if change:
+                _project_status(delta, change[0], -1)
+                _project_status(delta, change[1], 1)
+            change = _change(obj, 'budget')
+            if change:
+                created['project_budget_total'] += (change[1] or 0) - (change[0] or 0)
+        elif isinstance(obj, Transaction):
+            status = _change(obj, 'status')
+            amount = _change(obj, 'amount')
+            old_amount = amount[0] if amount else obj.amount
+            if status:
+                _transaction_status(delta, status[0], old_amount, -1)
+                _transaction_status(delta, status[1], obj.amount, 1)
+            elif amount:
+                column = TRANSACTION_AMOUNT_COLUMNS.get(obj.status)
+                if column:
+                    created[column] += (amount[1] or 0) - (amount[0] or 0)
+        elif isinstance(obj, Dispute):
+            change = _change(obj, 'status')
+            if change and 'resolved' in change and change[0] != change[1]:
+                delta['disputes_resolved'] += 1 if change[1] == 'resolved' else -1
+
+    return {
+        day: {k: v for k, v in delta.items() if v}
+        for day, delta in deltas.items()
+        if any(delta.values())
+    }
+
+
+def _upsert(connection, day, values):
+    """Add `values` to the counters of `day`, creating the row if needed"""
+    table = DailyMetric.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(values)
+        stmt = insert(table).values(day=day, **row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day'],
+            set_={k: table.c[k] + stmt.excluded[k] for k in values}
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        table.update().where(table.c.day == day).values(
+            **{k: table.c[k] + v for k, v in values.items()}
+        )
+    )
+    if result.rowcount == 0:
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(values)
+        connection.execute(table.insert().values(day=day, **row))
+
+
+def _before_flush(session, flush_context, instances):
+    for day, values in collect_deltas(session).items():
+        _upsert(session.connection(), day, values)
+
+
+def rebuild():
+    """Recompute daily_metrics from the base tables. Returns the number of days written."""
+    days = defaultdict(Counter)
+
+    def add(date_column, aggregate, column, *filters, group=None):
+        day = func.date(date_column)
+        columns = [day, aggregate] + ([group] if group is not None else [])
+        query = db.session.query(*columns).filter(date_column.isnot(None), *filters).group_by(day)
+        if group is not None:
+            query = query.group_by(group)
+        for row in query.all():
+            name = column(row[2]) if callable(column) else column
+            if name:
+                days[_as_date(row[0])][name] += row[1] or 0
+
+    add(User.created_at, func.count(User.id), 'new_users')
+    add(User.created_at, func.count(User.id),
+        lambda role: f'new_{role}s' if role in ('customer', 'creator') else None, group=User.role)
+    add(User.created_at, func.count(User.id), 'users_deactivated', User.is_active.is_(False))
+
+    add(Project.created_at, func.count(Project.id), 'projects_created')
+    add(Project.created_at, func.sum(Project.budget), 'project_budget_total')
+    add(Project.created_at, func.count(Project.id), 'projects_open', Project.status == 'open')
+    add(Project.created_at, func.count(Project.id), 'projects_active', Project.status.in_(['assigned', 'in_progress']))
+    add(func.coalesce(Project.completed_at, Project.updated_at, Project.created_at),
+        func.count(Project.id), 'projects_completed', Project.status == 'completed')
+
+    completed_on = func.coalesce(Transaction.completed_at, Transaction.payment_confirmed_at, Transaction.created_at)
+    add(Transaction.created_at, func.count(Transaction.id), 'transactions_created')
+    add(completed_on, func.count(Transaction.id), 'transactions_completed', Transaction.status == 'completed')
+    add(completed_on, func.sum(Transaction.amount), 'completed_amount', Transaction.status == 'completed')
+    add(Transaction.created_at, func.sum(Transaction.amount), 'pending_amount', Transaction.status == 'pending')
+    add(Transaction.created_at, func.sum(Transaction.amount), 'refunded_amount', Transaction.status == 'refunded')
+
+    add(Dispute.created_at, func.count(Dispute.id), 'disputes_opened')
+    add(Dispute.resolved_at, func.count(Dispute.id), 'disputes_resolved', Dispute.status == 'resolved')
+
+    DailyMetric.query.delete()
+    for day, counters in days.items():
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(counters)
+        db.session.add(DailyMetric(day=day, **row))
+    db.session.commit()
+    return len(days)
+
+
+def totals(since=None):
+    """Sum every counter, optionally only from `since` (a date) onwards"""
+    query = db.session.query(*[
+        func.coalesce(func.sum(getattr(DailyMetric, column)), 0) for column in COUNTER_COLUMNS
+    ])
+    if since:
+        query = query.filter(DailyMetric.day >= since)
+    return dict(zip(COUNTER_COLUMNS, query.one()))
+
+
+def daily_rows(start, end):
+    """Return {date: DailyMetric} for rows between start and end inclusive"""
+    rows = DailyMetric.query.filter(DailyMetric.day >= start, DailyMetric.day <= end).all()
+    return {row.day: row for row in rows}
+
+
+def days_ago(days):
+    return datetime.utcnow().date() - timedelta(days=days)
+
+
+def init_metrics(app):
+    """Register the rollup flush hook and the rebuild command"""
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+
+    @app.cli.command('rebuild-metrics')
+    def rebuild_metrics_command():
+        """Recompute the daily_metrics rollup table from the base tables"""
+        click.echo(f'Rebuilt daily metrics for {rebuild()} days')
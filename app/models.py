@@ -6,6 +6,10 @@ from app import db
 class User(UserMixin, db.Model):
     """User model for customers and creators"""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Creator directory filters and default ranking (app/creators.py)
+        db.Index('idx_users_directory', 'role', 'is_active', 'domain', 'rating'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
@@ -31,6 +35,9 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
     
+    # Denormalized unread notification count (see notification_helpers)
+    unread_notifications = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -56,6 +63,10 @@ class User(UserMixin, db.Model):
         return f'<User {self.email}>'
 
 
+# Case-insensitive location prefix search in the creator directory
+db.Index('idx_users_location', db.func.lower(User.location))
+
+
 class Project(db.Model):
     """Project model for customer job postings"""
     __tablename__ = 'projects'
@@ -126,6 +137,14 @@ class Application(db.Model):
 class Message(db.Model):
     """Message model for project chat"""
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Covers the grouped unread-counter query in message_helpers
+        db.Index('idx_messages_unread', 'project_id', 'is_read', 'sender_id'),
+        # Keyset pagination of chat history by (created_at, id)
+        db.Index('idx_messages_history', 'project_id', 'created_at', 'id'),
+        # Client-generated ids make resent messages idempotent
+        db.Index('idx_messages_client_id', 'sender_id', 'client_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
@@ -133,6 +152,7 @@ class Message(db.Model):
     
     content = db.Column(db.Text, nullable=False)
     attachments = db.Column(db.Text)  # JSON string of file paths
+    client_id = db.Column(db.String(36))  # Generated by the sending client
     
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -197,6 +217,61 @@ class Review(db.Model):
         return f'<Review {self.id}>'
 
 
+class CreatorRating(db.Model):
+    """Running review aggregate per creator, maintained on write by app/ratings.py"""
+    __tablename__ = 'creator_ratings'
+    
+    creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    review_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Histogram: number of reviews per star rating
+    stars_1 = db.Column(db.Integer, default=0, nullable=False)
+    stars_2 = db.Column(db.Integer, default=0, nullable=False)
+    stars_3 = db.Column(db.Integer, default=0, nullable=False)
+    stars_4 = db.Column(db.Integer, default=0, nullable=False)
+    stars_5 = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<CreatorRating {self.creator_id}: {self.rating_sum}/{self.review_count}>'
+
+
+class CreatorStats(db.Model):
+    """Precomputed creator directory stats, maintained by app/creator_stats.py"""
+    __tablename__ = 'creator_stats'
+    __table_args__ = (
+        db.Index('idx_creator_stats_completed', 'completed_projects'),
+        db.Index('idx_creator_stats_rank', 'rank_score', 'creator_id'),
+    )
+    
+    creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    completed_projects = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Default directory ranking (Bayesian average rating), kept by app/ratings.py;
+    # 3.5 is creator_stats.PRIOR_RATING, the score of a creator without reviews
+    rank_score = db.Column(db.Float, default=3.5, nullable=False)
+    
+    # Chat replies to the customer: count and total delay, refreshed periodically
+    response_count = db.Column(db.Integer, default=0, nullable=False)
+    response_seconds_total = db.Column(db.Float, default=0, nullable=False)
+    avg_response_seconds = db.Column(db.Float)
+    responses_updated_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<CreatorStats {self.creator_id}>'
+
+
+class CreatorSkill(db.Model):
+    """Normalized creator skills (from User.skills) for indexed directory filtering"""
+    __tablename__ = 'creator_skills'
+    
+    skill = db.Column(db.String(50), primary_key=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, index=True)
+    
+    def __repr__(self):
+        return f'<CreatorSkill {self.creator_id}: {self.skill}>'
+
+
 class Package(db.Model):
     """Service package model for creators"""
     __tablename__ = 'packages'
@@ -229,6 +304,8 @@ class Upload(db.Model):
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     file_path = db.Column(db.String(255), nullable=False)
+    # SHA-256 of the content; blobs are shared by every row with the same hash (app/storage.py)
+    content_hash = db.Column(db.String(64), index=True)
     file_type = db.Column(db.String(50))  # 'image', 'video', 'document'
     file_size = db.Column(db.Integer)  # in bytes
     original_filename = db.Column(db.String(255))
@@ -238,10 +315,34 @@ class Upload(db.Model):
     
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Resized copies of images (app/thumbnails.py)
+    derivatives = db.relationship('UploadDerivative', backref='upload', lazy=True,
+                                  order_by='UploadDerivative.width', cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f'<Upload {self.original_filename}>'
 
 
+class UploadDerivative(db.Model):
+    """Resized copy of an uploaded image in one width and format"""
+    __tablename__ = 'upload_derivatives'
+    __table_args__ = (
+        db.Index('idx_upload_derivatives_upload', 'upload_id', 'format', 'width', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('uploads.id', ondelete='CASCADE'), nullable=False)
+    
+    format = db.Column(db.String(10), nullable=False)  # 'webp' or 'jpeg'
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    file_path = db.Column(db.String(255), nullable=False)
+    file_size = db.Column(db.Integer)  # in bytes
+    
+    def __repr__(self):
+        return f'<UploadDerivative {self.upload_id} {self.width}w {self.format}>'
+
+
 class Notification(db.Model):
     """Notification model for payment and delivery updates"""
     __tablename__ = 'notifications'
@@ -274,6 +375,11 @@ class Notification(db.Model):
 class Dispute(db.Model):
     """Dispute model for payment disputes"""
     __tablename__ = 'disputes'
+    __table_args__ = (
+        db.Index('idx_disputes_transaction', 'transaction_id'),
+        db.Index('idx_disputes_raised_by', 'raised_by_id'),
+        db.Index('idx_disputes_status', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id'), nullable=False)
@@ -299,3 +405,67 @@ class Dispute(db.Model):
     
     def __repr__(self):
         return f'<Dispute {self.id}: {self.dispute_type}>'
+
+
+class DailyMetric(db.Model):
+    """Per-day platform counters, maintained on write by app/metrics.py
+
+    Most columns are net deltas for the day, so summing a column over all
+    rows gives the current platform total.
+    """
+    __tablename__ = 'daily_metrics'
+    
+    day = db.Column(db.Date, primary_key=True)
+    
+    # Users
+    new_users = db.Column(db.Integer, default=0, nullable=False)
+    new_customers = db.Column(db.Integer, default=0, nullable=False)
+    new_creators = db.Column(db.Integer, default=0, nullable=False)
+    users_deactivated = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Projects
+    projects_created = db.Column(db.Integer, default=0, nullable=False)
+    projects_open = db.Column(db.Integer, default=0, nullable=False)
+    projects_active = db.Column(db.Integer, default=0, nullable=False)  # assigned + in_progress
+    projects_completed = db.Column(db.Integer, default=0, nullable=False)
+    project_budget_total = db.Column(db.Float, default=0, nullable=False)
+    
+    # Transactions
+    transactions_created = db.Column(db.Integer, default=0, nullable=False)
+    transactions_completed = db.Column(db.Integer, default=0, nullable=False)
+    completed_amount = db.Column(db.Float, default=0, nullable=False)
+    pending_amount = db.Column(db.Float, default=0, nullable=False)
+    refunded_amount = db.Column(db.Float, default=0, nullable=False)
+    
+    # Disputes
+    disputes_opened = db.Column(db.Integer, default=0, nullable=False)
+    disputes_resolved = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailyMetric {self.day}>'
+
+
+class Job(db.Model):
+    """Durable background job, executed by app/jobs.py workers"""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('idx_jobs_ready', 'status', 'run_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments
+    
+    # Status tracking
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text)
+    
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.task} ({self.status})>'
@@ -1,10 +1,69 @@
-"""Helper functions for creating and managing notifications"""
+"""Helper functions for creating and managing notifications
+
+Each user carries a denormalized `unread_notifications` counter that is
+updated in the same transaction as the notification rows. Notifications
+are written inside the caller's transaction (nothing here commits on
+behalf of the caller); count changes are pushed to the user's SocketIO
+room once that transaction commits, and dropped if it rolls back.
+"""
+from collections import Counter, defaultdict
 from datetime import datetime
-from app import db
-from app.models import Notification
+from sqlalchemy import case, event, select
+from app import db, socketio
+from app.jobs import enqueue
+from app.models import Notification, User
+from app.user_cache import invalidate_on_commit
+
+PENDING_PUSHES = 'notification_pushes'
+
+def user_room(user_id):
+    """SocketIO room every connection of a user joins"""
+    return f'user_{user_id}'
+
+def _queue_push(user_ids):
+    """Push counts for these users after the current transaction commits"""
+    db.session.info.setdefault(PENDING_PUSHES, set()).update(user_ids)
+    # Cached users carry the counter too
+    invalidate_on_commit(user_ids)
+
+def push_unread_counts(user_ids):
+    """Send current unread counts to every open tab of the given users"""
+    if not user_ids:
+        return
+    # Runs after commit, when the session itself cannot emit SQL
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            select(User.id, User.unread_notifications).where(User.id.in_(list(user_ids)))
+        ).all()
+    for user_id, count in rows:
+        socketio.emit('notification_count', {'count': count or 0}, room=user_room(user_id))
+
+def _after_commit(session):
+    push_unread_counts(session.info.pop(PENDING_PUSHES, None))
+
+def _after_rollback(session):
+    session.info.pop(PENDING_PUSHES, None)
+
+def init_notifications(app):
+    """Register the post-commit push hooks"""
+    if not event.contains(db.session, 'after_commit', _after_commit):
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
+
+def _increment_unread(per_user):
+    """Bump unread counters, one UPDATE per distinct increment"""
+    by_increment = defaultdict(list)
+    for user_id, increment in per_user.items():
+        by_increment[increment].append(user_id)
+    for increment, user_ids in by_increment.items():
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.unread_notifications: User.unread_notifications + increment},
+            synchronize_session=False
+        )
+    _queue_push(per_user)
 
 def create_notification(user_id, notification_type, title, message, project_id=None, transaction_id=None):
-    """Create a new notification for a user"""
+    """Add a notification for a user to the current transaction (caller commits)"""
     notification = Notification(
         user_id=user_id,
         type=notification_type,
@@ -14,21 +73,72 @@ def create_notification(user_id, notification_type, title, message, project_id=N
         transaction_id=transaction_id
     )
     db.session.add(notification)
-    db.session.commit()
+    _increment_unread({user_id: 1})
     return notification
 
+def notify_many(notifications):
+    """Add many notifications with a single multi-row INSERT (caller commits).
+
+    `notifications` is an iterable of dicts taking the same keyword
+    arguments as create_notification. Returns the number of rows written.
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': n['user_id'],
+        'type': n['notification_type'],
+        'title': n['title'],
+        'message': n['message'],
+        'project_id': n.get('project_id'),
+        'transaction_id': n.get('transaction_id'),
+        'is_read': False,
+        'created_at': now
+    } for n in notifications]
+    if not rows:
+        return 0
+    
+    db.session.execute(Notification.__table__.insert().values(rows))
+    _increment_unread(Counter(row['user_id'] for row in rows))
+    return len(rows)
+
+def notify_later(notifications):
+    """Queue notifications for a background worker in the current transaction (caller commits)"""
+    notifications = list(notifications)
+    if notifications:
+        enqueue('notifications.send', notifications=notifications)
+
 def get_unread_count(user_id):
     """Get count of unread notifications for a user"""
-    return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    return db.session.query(User.unread_notifications).filter_by(id=user_id).scalar() or 0
 
-def mark_as_read(notification_id):
-    """Mark a notification as read"""
+def mark_as_read(notification_id, user_id=None):
+    """Mark a notification as read (only if it belongs to user_id, when given)"""
     notification = Notification.query.get(notification_id)
-    if notification:
+    if not notification or (user_id is not None and notification.user_id != user_id):
+        return None
+    if not notification.is_read:
         notification.is_read = True
+        User.query.filter_by(id=notification.user_id).update(
+            {User.unread_notifications: case(
+                (User.unread_notifications > 0, User.unread_notifications - 1),
+                else_=0
+            )},
+            synchronize_session=False
+        )
+        _queue_push([notification.user_id])
         db.session.commit()
     return notification
 
+def mark_all_as_read(user_id):
+    """Mark every notification of a user as read"""
+    Notification.query.filter_by(user_id=user_id, is_read=False).update(
+        {Notification.is_read: True}, synchronize_session=False
+    )
+    User.query.filter_by(id=user_id).update(
+        {User.unread_notifications: 0}, synchronize_session=False
+    )
+    _queue_push([user_id])
+    db.session.commit()
+
 def get_user_notifications(user_id, limit=20):
     """Get recent notifications for a user"""
     return Notification.query.filter_by(user_id=user_id).order_by(
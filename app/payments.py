@@ -1,18 +1,21 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_from_directory
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_from_directory, send_file, abort
 from flask_login import login_required, current_user
 from datetime import datetime
-from werkzeug.utils import secure_filename
-import os
 import stripe
-import qrcode
 from io import BytesIO
 import base64
 from app import db
 from app.models import Project, Transaction, User, Notification
-from app.notification_helpers import create_notification, get_unread_count, mark_as_read, get_user_notifications
+from app.jobs import enqueue
+from app.notification_helpers import notify_later, get_unread_count, mark_as_read, mark_all_as_read, get_user_notifications
+from app.qr_cache import get_qr_png, qr_key, upi_link
+from app.storage import file_extension, save_upload
 
 payments_bp = Blueprint('payments', __name__, url_prefix='/payment')
 
+# Browser cache lifetime of QR code PNGs (the URL changes with the content)
+QR_MAX_AGE = 7 * 24 * 3600
+
 def init_stripe():
     """Initialize Stripe with secret key"""
     from flask import current_app
@@ -40,37 +43,31 @@ def customer_confirm_payment(transaction_id):
         if file and file.filename:
             # Validate file type
             allowed_extensions = {'png', 'jpg', 'jpeg', 'pdf', 'webp'}
-            filename = secure_filename(file.filename)
-            file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
             
-            if file_ext in allowed_extensions:
-                # Create unique filename
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                new_filename = f"payment_{transaction_id}_{timestamp}.{file_ext}"
-                
-                # Save file
-                upload_folder = os.path.join('app', 'static', 'payment_screenshots')
-                os.makedirs(upload_folder, exist_ok=True)
-                filepath = os.path.join(upload_folder, new_filename)
-                file.save(filepath)
+            if file_extension(file.filename) in allowed_extensions:
+                upload = save_upload(file, current_user.id, 'payment')
                 
                 # Save path to database
-                transaction.payment_screenshot = f'payment_screenshots/{new_filename}'
+                transaction.payment_screenshot = upload.file_path
                 transaction.screenshot_uploaded_at = datetime.utcnow()
+                
+                # Rotate/downscale in the background
+                enqueue('payments.process_screenshot', transaction_id=transaction_id)
     
     # Mark customer as confirmed
     transaction.customer_confirmed = True
-    db.session.commit()
     
     # Notify creator to check payment
-    create_notification(
-        user_id=transaction.creator_id,
-        notification_type='payment_pending',
-        title='💰 Payment Confirmation Pending',
-        message=f'Customer has paid ₹{transaction.amount} for "{project.title}". Please check your UPI app and confirm receipt.',
-        project_id=project.id,
-        transaction_id=transaction_id
-    )
+    notify_later([{
+        'user_id': transaction.creator_id,
+        'notification_type': 'payment_pending',
+        'title': '💰 Payment Confirmation Pending',
+        'message': f'Customer has paid ₹{transaction.amount} for "{project.title}". Please check your UPI app and confirm receipt.',
+        'project_id': project.id,
+        'transaction_id': transaction_id
+    }])
+    
+    db.session.commit()
     
     flash('Payment confirmation sent! Waiting for creator to verify receipt.', 'success')
     return jsonify({'success': True}), 200
@@ -97,17 +94,17 @@ def creator_confirm_payment(transaction_id):
     project.status = 'completed'
     project.completed_at = datetime.utcnow()
     
-    db.session.commit()
-    
     # Notify customer that payment is confirmed and link is unlocked
-    create_notification(
-        user_id=transaction.customer_id,
-        notification_type='payment_received',
-        title='✅ Payment Confirmed!',
-        message=f'Creator confirmed receiving ₹{transaction.amount} for "{project.title}". Delivery files are now accessible!',
-        project_id=project.id,
-        transaction_id=transaction_id
-    )
+    notify_later([{
+        'user_id': transaction.customer_id,
+        'notification_type': 'payment_received',
+        'title': '✅ Payment Confirmed!',
+        'message': f'Creator confirmed receiving ₹{transaction.amount} for "{project.title}". Delivery files are now accessible!',
+        'project_id': project.id,
+        'transaction_id': transaction_id
+    }])
+    
+    db.session.commit()
     
     flash('Payment confirmed! Customer can now access delivery files.', 'success')
     return jsonify({'success': True}), 200
@@ -126,58 +123,89 @@ def creator_reject_payment(transaction_id):
     
     # Reset customer confirmation
     transaction.customer_confirmed = False
-    db.session.commit()
     
     # Notify customer that payment not received
-    create_notification(
-        user_id=transaction.customer_id,
-        notification_type='payment_rejected',
-        title='❌ Payment Not Received',
-        message=f'Creator has not received payment for "{project.title}". Please check your UPI transaction and try again.',
-        project_id=project.id,
-        transaction_id=transaction_id
-    )
+    notify_later([{
+        'user_id': transaction.customer_id,
+        'notification_type': 'payment_rejected',
+        'title': '❌ Payment Not Received',
+        'message': f'Creator has not received payment for "{project.title}". Please check your UPI transaction and try again.',
+        'project_id': project.id,
+        'transaction_id': transaction_id
+    }])
+    
+    db.session.commit()
     
     flash('Customer has been notified that payment was not received.', 'info')
     return jsonify({'success': True}), 200
 
 
-@payments_bp.route('/qr/<int:transaction_id>')
-@login_required
-def generate_qr(transaction_id):
-    """Generate UPI QR code for payment"""
-    transaction = Transaction.query.get_or_404(transaction_id)
-    creator = User.query.get(transaction.creator_id)
-    project = Project.query.get(transaction.project_id)
+def _payment_qr_link(transaction_id):
+    """Return (link, details) for a transaction's UPI QR code, or (None, error response)"""
+    # Transaction, payee and project title in one query
+    row = db.session.query(
+        Transaction.customer_id, Transaction.amount, User.upi_id, User.full_name, Project.title
+    ).join(User, User.id == Transaction.creator_id).join(
+        Project, Project.id == Transaction.project_id
+    ).filter(Transaction.id == transaction_id).first()
+    
+    if row is None:
+        abort(404)
     
     # Only customer can view QR
-    if current_user.id != transaction.customer_id:
-        return jsonify({'error': 'Unauthorized'}), 403
+    if current_user.id != row.customer_id:
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
     
-    if not creator.upi_id:
-        return jsonify({'error': 'Creator has not set up UPI ID'}), 400
+    if not row.upi_id:
+        return None, (jsonify({'error': 'Creator has not set up UPI ID'}), 400)
     
-    # Create UPI payment link
-    upi_url = f"upi://pay?pa={creator.upi_id}&pn={creator.full_name}&am={transaction.amount}&cu=INR&tn=Payment for {project.title}"
+    link = upi_link(row.upi_id, row.full_name, row.amount, f'Payment for {row.title}')
+    return link, {'upi_id': row.upi_id, 'amount': row.amount, 'creator_name': row.full_name}
+
+
+@payments_bp.route('/qr/<int:transaction_id>')
+@login_required
+def generate_qr(transaction_id):
+    """UPI QR code for payment.
     
-    # Generate QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(upi_url)
-    qr.make(fit=True)
+    `qr_code` is the URL of the cached PNG (see qr_image), or an inline
+    base64 data URL with ?inline=1 or QR_INLINE set.
+    """
+    from flask import current_app
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    link, details = _payment_qr_link(transaction_id)
+    if link is None:
+        return details
     
-    # Convert to base64
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    if request.args.get('inline', type=int) or current_app.config.get('QR_INLINE'):
+        img_str = base64.b64encode(get_qr_png(link)).decode()
+        qr_code = f"data:image/png;base64,{img_str}"
+    else:
+        # Versioned by content, so the browser can keep it as long as it likes
+        qr_code = url_for('payments.qr_image', transaction_id=transaction_id, v=qr_key(link)[:16])
     
-    return jsonify({
-        'qr_code': f"data:image/png;base64,{img_str}",
-        'upi_id': creator.upi_id,
-        'amount': transaction.amount,
-        'creator_name': creator.full_name
-    }), 200
+    return jsonify({'qr_code': qr_code, **details}), 200
+
+
+@payments_bp.route('/qr/<int:transaction_id>.png')
+@login_required
+def qr_image(transaction_id):
+    """Cached UPI QR code PNG, revalidated by ETag"""
+    link, details = _payment_qr_link(transaction_id)
+    if link is None:
+        return details
+    
+    response = send_file(
+        BytesIO(get_qr_png(link)),
+        mimetype='image/png',
+        etag=qr_key(link),
+        conditional=True,
+        max_age=QR_MAX_AGE
+    )
+    # Payment details: never store in shared caches
+    response.cache_control.private = True
+    response.cache_control.public = False
+    return response
 
 
 # ====================
@@ -215,12 +243,20 @@ def unread_count():
 @login_required
 def mark_notification_read(notification_id):
     """Mark notification as read"""
-    notification = mark_as_read(notification_id)
-    if notification and notification.user_id == current_user.id:
+    notification = mark_as_read(notification_id, user_id=current_user.id)
+    if notification:
         return jsonify({'success': True}), 200
     return jsonify({'error': 'Not found'}), 404
 
 
+@payments_bp.route('/notifications/mark_all_read', methods=['POST'])
+@login_required
+def mark_all_notifications_read():
+    """Mark all of the user's notifications as read"""
+    mark_all_as_read(current_user.id)
+    return jsonify({'success': True}), 200
+
+
 # ====================
 # STRIPE ROUTES (existing)
 # ====================
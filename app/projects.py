@@ -1,24 +1,29 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import selectinload
 from datetime import datetime
-import os
 from app import db
 from app.models import Project, Application, User, Upload, Package, Review, Transaction
-from app.notification_helpers import create_notification
+from app.notification_helpers import notify_later
+from app.search import apply_search
+from app.socket_events import invalidate_project_access
+from app.ratings import rating_summary
+from app.storage import save_upload
 
 projects_bp = Blueprint('projects', __name__, url_prefix='/projects')
 
 @projects_bp.route('/')
 def list_projects():
     """List and search projects"""
+    from flask import current_app
+    
     # Get filter parameters
     category = request.args.get('category')
     min_budget = request.args.get('min_budget', type=float)
     max_budget = request.args.get('max_budget', type=float)
     search = request.args.get('search')
     status = request.args.get('status', 'open')
-    sort_by = request.args.get('sort', 'newest')
+    sort_by = request.args.get('sort', 'relevance' if search else 'newest')
     page = request.args.get('page', 1, type=int)
     
     # Build query
@@ -30,16 +35,16 @@ def list_projects():
         query = query.filter(Project.budget >= min_budget)
     if max_budget:
         query = query.filter(Project.budget <= max_budget)
-    if search:
-        query = query.filter(
-            (Project.title.ilike(f'%{search}%')) |
-            (Project.description.ilike(f'%{search}%'))
-        )
     if status:
         query = query.filter_by(status=status)
+    rank = None
+    if search:
+        query, rank = apply_search(query, search, current_app.extensions.get('project_search'))
     
     # Apply sorting
-    if sort_by == 'oldest':
+    if sort_by == 'relevance' and rank is not None:
+        query = query.order_by(rank.desc(), Project.created_at.desc())
+    elif sort_by == 'oldest':
         query = query.order_by(Project.created_at.asc())
     elif sort_by == 'price_low':
         query = query.order_by(Project.budget.asc())
@@ -49,7 +54,6 @@ def list_projects():
         query = query.order_by(Project.created_at.desc())
     
     # Paginate
-    from flask import current_app
     per_page = current_app.config.get('PROJECTS_PER_PAGE', 12)
     projects = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -128,30 +132,7 @@ def create():
             files = request.files.getlist('attachments')
             for file in files:
                 if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                    filename = f"project_{project.id}_{timestamp}_{filename}"
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    
-                    # Determine file type
-                    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-                    if ext in ['jpg', 'jpeg', 'png', 'gif']:
-                        file_type = 'image'
-                    elif ext in ['mp4', 'mov', 'avi']:
-                        file_type = 'video'
-                    else:
-                        file_type = 'document'
-                    
-                    upload = Upload(
-                        owner_id=current_user.id,
-                        file_path=f'/static/uploads/{filename}',
-                        file_type=file_type,
-                        file_size=os.path.getsize(filepath),
-                        original_filename=file.filename,
-                        upload_type='project'
-                    )
-                    db.session.add(upload)
+                    save_upload(file, current_user.id, 'project')
         
         db.session.commit()
         flash('Project posted successfully!', 'success')
@@ -227,6 +208,7 @@ def assign(project_id):
         app.status = 'rejected'
     
     db.session.commit()
+    invalidate_project_access(project.id)
     
     flash(f'Creator assigned successfully!', 'success')
     return jsonify({'success': True}), 200
@@ -287,13 +269,13 @@ def submit_delivery(project_id):
             db.session.add(transaction)
             
             # Notify customer about delivery
-            create_notification(
-                user_id=project.posted_by_id,
-                notification_type='delivery_submitted',
-                title='🎉 Delivery Received!',
-                message=f'{current_user.full_name} has submitted the delivery for "{project.title}". Please review and make payment.',
-                project_id=project_id
-            )
+            notify_later([{
+                'user_id': project.posted_by_id,
+                'notification_type': 'delivery_submitted',
+                'title': '🎉 Delivery Received!',
+                'message': f'{current_user.full_name} has submitted the delivery for "{project.title}". Please review and make payment.',
+                'project_id': project_id
+            }])
     
     db.session.commit()
     
@@ -363,18 +345,11 @@ def review(project_id):
         )
         db.session.add(review_obj)
         
-        # Update creator rating
-        creator = project.creator
-        reviews = Review.query.filter_by(creator_id=creator.id).all()
-        total_rating = sum([r.rating for r in reviews]) + rating
-        total_reviews = len(reviews) + 1
-        creator.rating = round(total_rating / total_reviews, 2)
-        creator.total_reviews = total_reviews
-        
+        # The creator's rating is updated at flush (app/ratings.py)
         db.session.commit()
         
         flash('Review submitted successfully!', 'success')
-        return redirect(url_for('projects.creator_profile', creator_id=creator.id))
+        return redirect(url_for('projects.creator_profile', creator_id=project.assigned_to_id))
     
     return render_template('projects/review.html', project=project)
 
@@ -389,8 +364,8 @@ def creator_profile(creator_id):
         flash('User is not a creator.', 'warning')
         return redirect(url_for('main.index'))
     
-    # Get portfolio
-    portfolio = Upload.query.filter_by(
+    # Get portfolio, with resized copies for srcset
+    portfolio = Upload.query.options(selectinload(Upload.derivatives)).filter_by(
         owner_id=creator_id,
         upload_type='portfolio'
     ).all()
@@ -403,6 +378,7 @@ def creator_profile(creator_id):
     
     # Get reviews
     reviews = Review.query.filter_by(creator_id=creator_id).order_by(Review.created_at.desc()).limit(10).all()
+    rating_histogram = rating_summary(creator_id)['histogram']
     
     # Get completed projects count
     completed_count = Project.query.filter_by(
@@ -416,6 +392,7 @@ def creator_profile(creator_id):
         portfolio=portfolio,
         packages=packages,
         reviews=reviews,
+        rating_histogram=rating_histogram,
         completed_count=completed_count
     )
 
@@ -436,28 +413,29 @@ def delete_project(project_id):
     project.deleted_by_id = current_user.id
     project.deleted_at = datetime.utcnow()
     project.deletion_reason = reason
-    db.session.commit()
     
     # Notify the other party
     if current_user.id == project.posted_by_id:
         # Customer deleted - notify creator if assigned
         if project.assigned_to_id:
-            create_notification(
-                user_id=project.assigned_to_id,
-                notification_type='project_deleted',
-                title='🗑️ Project Deleted by Customer',
-                message=f'Customer deleted project "{project.title}". Reason: {reason}',
-                project_id=project.id
-            )
+            notify_later([{
+                'user_id': project.assigned_to_id,
+                'notification_type': 'project_deleted',
+                'title': '🗑️ Project Deleted by Customer',
+                'message': f'Customer deleted project "{project.title}". Reason: {reason}',
+                'project_id': project.id
+            }])
     else:
         # Creator deleted - notify customer
-        create_notification(
-            user_id=project.posted_by_id,
-            notification_type='project_deleted',
-            title='🗑️ Project Deleted by Creator',
-            message=f'Creator deleted project "{project.title}". Reason: {reason}',
-            project_id=project.id
-        )
+        notify_later([{
+            'user_id': project.posted_by_id,
+            'notification_type': 'project_deleted',
+            'title': '🗑️ Project Deleted by Creator',
+            'message': f'Creator deleted project "{project.title}". Reason: {reason}',
+            'project_id': project.id
+        }])
+    
+    db.session.commit()
     
     flash('Project deleted successfully', 'success')
     return jsonify({'success': True})
@@ -480,16 +458,18 @@ def leave_project(project_id):
     project.creator_left_at = datetime.utcnow()
     project.assigned_to_id = None  # Unassign creator
     project.status = 'open'  # Back to open status
-    db.session.commit()
     
     # Notify customer
-    create_notification(
-        user_id=project.posted_by_id,
-        notification_type='creator_left_project',
-        title='👋 Creator Left Your Project',
-        message=f'Creator {current_user.full_name} doesn\'t want to work on "{project.title}". Reason: {reason}. The project is now open for new applications.',
-        project_id=project.id
-    )
+    notify_later([{
+        'user_id': project.posted_by_id,
+        'notification_type': 'creator_left_project',
+        'title': '👋 Creator Left Your Project',
+        'message': f'Creator {current_user.full_name} doesn\'t want to work on "{project.title}". Reason: {reason}. The project is now open for new applications.',
+        'project_id': project.id
+    }])
+    
+    db.session.commit()
+    invalidate_project_access(project.id)
     
     flash('You have left this project. Customer has been notified.', 'info')
     return jsonify({'success': True})
@@ -0,0 +1,90 @@
+"""Cache for rendered UPI payment QR codes
+
+A QR code only depends on its UPI link (payee UPI id, payee name, amount
+and note), so the PNG is stored under the SHA-256 of that link: first in
+a per-process LRU of QR_CACHE_SIZE entries, then on disk under
+QR_CACHE_DIR (shared by every worker on the machine). The same hash is
+the ETag of the PNG endpoint, so browsers revalidate with a 304 instead
+of downloading it again.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from urllib.parse import quote, urlencode
+import qrcode
+from flask import current_app
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def upi_link(upi_id, payee_name, amount, note):
+    """upi://pay link with every parameter URL-encoded (the VPA keeps its '@')"""
+    params = urlencode({
+        'pa': upi_id,
+        'pn': payee_name,
+        'am': f'{amount:.2f}',
+        'cu': 'INR',
+        'tn': note
+    }, safe='@', quote_via=quote)
+    return f'upi://pay?{params}'
+
+
+def qr_key(link):
+    return hashlib.sha256(link.encode()).hexdigest()
+
+
+def render_qr(link):
+    """PNG bytes of a QR code for `link`"""
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(link)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def _disk_path(key):
+    root = current_app.config.get('QR_CACHE_DIR') or os.path.join(current_app.instance_path, 'qr_cache')
+    return os.path.join(root, key[:2], f'{key}.png')
+
+
+def _remember(key, png):
+    with _memory_lock:
+        _memory[key] = png
+        _memory.move_to_end(key)
+        while len(_memory) > current_app.config.get('QR_CACHE_SIZE', 256):
+            _memory.popitem(last=False)
+
+
+def get_qr_png(link):
+    """PNG bytes for `link` from memory, disk or a fresh render"""
+    key = qr_key(link)
+    with _memory_lock:
+        png = _memory.get(key)
+        if png is not None:
+            _memory.move_to_end(key)
+            return png
+
+    path = _disk_path(key)
+    try:
+        with open(path, 'rb') as f:
+            png = f.read()
+    except OSError:
+        png = render_qr(link)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write next to the final file and swap, so readers never see a partial PNG
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write QR cache file: {e}")
+
+    _remember(key, png)
+    return png
@@ -0,0 +1,187 @@
+"""Creator rating aggregate
+
+A session flush hook turns added and deleted reviews into deltas on the
+creator's creator_ratings row (review count, rating sum and per-star
+histogram), upserted in the same transaction, copies the new average
+onto users.rating / users.total_reviews and the new ranking score onto
+creator_stats.rank_score. A review therefore costs a few single-row
+statements however many reviews the creator has.
+
+Run `python manage.py rebuild-ratings` to recompute everything from the
+reviews table after manual data fixes.
+"""
+from collections import Counter, defaultdict
+import click
+from sqlalchemy import event, func, inspect, update
+from app import db
+from app.models import CreatorRating, Review, User
+from app.creator_stats import PRIOR_RATING, rank_score, upsert_stats
+from app.landing_cache import invalidate_on_commit as invalidate_landing
+from app.user_cache import invalidate_on_commit as invalidate_users
+
+STARS = range(1, 6)
+COUNTER_COLUMNS = ['review_count', 'rating_sum'] + [f'stars_{star}' for star in STARS]
+
+
+def _add(delta, rating, sign):
+    delta['review_count'] += sign
+    delta['rating_sum'] += sign * rating
+    if rating in STARS:
+        delta[f'stars_{rating}'] += sign
+
+
+def collect_deltas(session):
+    """Compute {creator_id: {column: delta}} for the pending flush"""
+    deltas = defaultdict(Counter)
+
+    for obj in session.new:
+        if isinstance(obj, Review):
+            _add(deltas[obj.creator_id], obj.rating, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Review):
+            _add(deltas[obj.creator_id], obj.rating, -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Review):
+            history = inspect(obj).attrs.rating.history
+            if history.deleted and history.added:
+                _add(deltas[obj.creator_id], history.deleted[0], -1)
+                _add(deltas[obj.creator_id], history.added[0], 1)
+
+    return {
+        creator_id: {k: v for k, v in delta.items() if v}
+        for creator_id, delta in deltas.items()
+        if any(delta.values())
+    }
+
+
+def average(rating_sum, review_count):
+    return round(rating_sum / review_count, 2) if review_count else 0.0
+
+
+def _upsert(connection, creator_id, values):
+    """Add `values` to a creator's aggregate; returns the new (review_count, rating_sum)"""
+    table = CreatorRating.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(values)
+        stmt = insert(table).values(creator_id=creator_id, **row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['creator_id'],
+            set_={k: table.c[k] + stmt.excluded[k] for k in values}
+        ).returning(table.c.review_count, table.c.rating_sum)
+        return connection.execute(stmt).one()
+
+    result = connection.execute(
+        table.update().where(table.c.creator_id == creator_id).values(
+            **{k: table.c[k] + v for k, v in values.items()}
+        )
+    )
+    if result.rowcount == 0:
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(values)
+        connection.execute(table.insert().values(creator_id=creator_id, **row))
+    return connection.execute(
+        db.select(table.c.review_count, table.c.rating_sum).where(table.c.creator_id == creator_id)
+    ).one()
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = collect_deltas(session)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    users = User.__table__
+    scores = []
+    for creator_id, values in deltas.items():
+        review_count, rating_sum = _upsert(connection, creator_id, values)
+        connection.execute(users.update().where(users.c.id == creator_id).values(
+            rating=average(rating_sum, review_count),
+            total_reviews=review_count
+        ))
+        scores.append({'creator_id': creator_id, 'rank_score': rank_score(rating_sum, review_count)})
+    upsert_stats(connection, scores)
+
+    # users was updated behind the ORM's back
+    invalidate_users(deltas.keys())
+    invalidate_landing()
+
+
+def histogram(aggregate):
+    """{stars: number of reviews}, highest first"""
+    return {star: getattr(aggregate, f'stars_{star}', 0) if aggregate else 0 for star in reversed(STARS)}
+
+
+def rating_summary(creator_id):
+    """Average, review count and histogram for a creator from the aggregate row"""
+    aggregate = db.session.get(CreatorRating, creator_id)
+    return {
+        'average': average(aggregate.rating_sum, aggregate.review_count) if aggregate else 0.0,
+        'total_reviews': aggregate.review_count if aggregate else 0,
+        'histogram': histogram(aggregate)
+    }
+
+
+def rebuild():
+    """Recompute creator_ratings, users.rating and the ranking scores from reviews. Returns the number of creators rated."""
+    aggregates = defaultdict(Counter)
+    rows = db.session.query(Review.creator_id, Review.rating, func.count(Review.id)).group_by(
+        Review.creator_id, Review.rating
+    ).all()
+    for creator_id, rating, count in rows:
+        aggregate = aggregates[creator_id]
+        aggregate['review_count'] += count
+        aggregate['rating_sum'] += rating * count
+        if rating in STARS:
+            aggregate[f'stars_{rating}'] += count
+
+    CreatorRating.query.delete()
+    for creator_id, counters in aggregates.items():
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update(counters)
+        db.session.add(CreatorRating(creator_id=creator_id, **row))
+
+    # Creators without reviews go back to zero
+    stale = db.session.query(User.id).filter(db.or_(User.rating != 0, User.total_reviews != 0))
+    if aggregates:
+        stale = stale.filter(User.id.notin_(list(aggregates)))
+    stale = stale.all()
+    user_rows = [{'id': user_id, 'rating': 0.0, 'total_reviews': 0} for (user_id,) in stale]
+    user_rows += [{
+        'id': creator_id,
+        'rating': average(counters['rating_sum'], counters['review_count']),
+        'total_reviews': counters['review_count']
+    } for creator_id, counters in aggregates.items()]
+    if user_rows:
+        db.session.execute(update(User), user_rows)
+
+    creator_ids = {user_id for (user_id,) in db.session.query(User.id).filter(User.role == 'creator')}
+    upsert_stats(db.session.connection(), [{
+        'creator_id': creator_id,
+        'rank_score': rank_score(aggregates[creator_id]['rating_sum'], aggregates[creator_id]['review_count'])
+        if creator_id in aggregates else PRIOR_RATING
+    } for creator_id in creator_ids | set(aggregates)])
+
+    invalidate_users([row['id'] for row in user_rows])
+    invalidate_landing()
+    db.session.commit()
+    return len(aggregates)
+
+
+def init_ratings(app):
+    """Register the rating flush hook and the rebuild command"""
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings_command():
+        """Recompute creator ratings from the reviews table"""
+        click.echo(f'Rebuilt ratings for {rebuild()} creators')
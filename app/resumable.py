@@ -0,0 +1,324 @@
+"""Chunked, resumable uploads
+
+For large files on unreliable connections. The client opens a session,
+PUTs the file in RESUMABLE_CHUNK_SIZE pieces (in any order, each with an
+optional X-Chunk-SHA256 checksum), asks which chunks the server already
+has after a disconnect, and completes the session once all are there:
+
+    POST   /uploads/api                    {filename, size, upload_type, sha256?}
+    PUT    /uploads/api/<id>/chunks/<n>    raw chunk bytes
+    GET    /uploads/api/<id>               {received: [...], ...}
+    POST   /uploads/api/<id>/complete      -> {upload: {...}}
+    DELETE /uploads/api/<id>
+
+Chunks are streamed from the request body straight to their own file in
+the session directory (RESUMABLE_UPLOAD_DIR), so neither a chunk nor the
+whole file is held in memory. Completing concatenates them into
+content-addressed storage (app/storage.py) and creates the Upload row.
+
+A user may have RESUMABLE_MAX_SESSIONS sessions open at once. Sessions
+idle for RESUMABLE_UPLOAD_TTL seconds no longer count towards that and
+are removed by the hourly `uploads.purge_stale` background task (see
+app/tasks.py), or at once with `python manage.py purge-stale-uploads`.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import click
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import login_required, current_user
+from app import db
+from app.models import Upload
+from app.storage import CHUNK_SIZE, file_extension, get_backend, store_stream, upload_for
+from app.thumbnails import queue_thumbnails
+
+resumable_bp = Blueprint('resumable', __name__, url_prefix='/uploads')
+
+# upload_type -> roles allowed to use it
+UPLOAD_TYPES = {
+    'portfolio': {'creator'},
+    'project': {'customer', 'creator'},
+}
+
+MANIFEST = 'manifest.json'
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _root():
+    return current_app.config.get('RESUMABLE_UPLOAD_DIR') or os.path.join(current_app.instance_path, 'resumable_uploads')
+
+
+def _session_dir(session_id):
+    return os.path.join(_root(), session_id)
+
+
+def _load(session_id):
+    """Manifest of the current user's session, or None"""
+    try:
+        uuid.UUID(session_id)
+        with open(os.path.join(_session_dir(session_id), MANIFEST)) as f:
+            manifest = json.load(f)
+    except (ValueError, OSError):
+        return None
+    if manifest['owner_id'] != current_user.id:
+        return None
+    return manifest
+
+
+def _open_sessions(owner_id):
+    """Number of sessions of `owner_id` active within RESUMABLE_UPLOAD_TTL"""
+    root = _root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - current_app.config.get('RESUMABLE_UPLOAD_TTL', 24 * 3600)
+    count = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name, MANIFEST)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                continue
+            with open(path) as f:
+                if json.load(f)['owner_id'] == owner_id:
+                    count += 1
+        except (OSError, ValueError, KeyError):
+            continue
+    return count
+
+
+def _chunk_count(manifest):
+    return max(1, -(-manifest['size'] // manifest['chunk_size']))
+
+
+def _chunk_length(manifest, index):
+    """Expected length of chunk `index`"""
+    if index < _chunk_count(manifest) - 1:
+        return manifest['chunk_size']
+    return manifest['size'] - manifest['chunk_size'] * index
+
+
+def _received(session_id, manifest):
+    directory = _session_dir(session_id)
+    return [index for index in range(_chunk_count(manifest))
+            if os.path.exists(os.path.join(directory, str(index)))]
+
+
+def _status(session_id, manifest):
+    return {
+        'id': session_id,
+        'filename': manifest['filename'],
+        'size': manifest['size'],
+        'chunk_size': manifest['chunk_size'],
+        'chunks': _chunk_count(manifest),
+        'received': _received(session_id, manifest)
+    }
+
+
+class _ChunkReader:
+    """Read a session's chunk files in order as one binary stream"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.current = None
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                if not self.paths:
+                    return b''
+                self.current = open(self.paths.pop(0), 'rb')
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+
+
+@resumable_bp.route('/api', methods=['POST'])
+@login_required
+def start():
+    """Open an upload session"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    filename = data.get('filename') or ''
+    upload_type = data.get('upload_type', 'portfolio')
+    size = data.get('size')
+    sha256 = data.get('sha256') or None
+
+    if not isinstance(filename, str) or not isinstance(upload_type, str):
+        return jsonify({'error': 'filename and upload_type must be strings'}), 400
+    if sha256 is not None:
+        if not isinstance(sha256, str) or not SHA256_PATTERN.match(sha256.lower()):
+            return jsonify({'error': 'sha256 must be 64 hexadecimal characters'}), 400
+        sha256 = sha256.lower()
+    filename = filename.strip()
+
+    if current_user.role not in UPLOAD_TYPES.get(upload_type, ()):
+        return jsonify({'error': 'Invalid upload type'}), 400
+    if file_extension(filename) not in current_app.config['ALLOWED_EXTENSIONS']:
+        return jsonify({'error': 'File type not allowed'}), 400
+    # bool is an int subclass, so JSON true would pass as 1
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return jsonify({'error': 'size is required'}), 400
+    if size > current_app.config.get('RESUMABLE_MAX_SIZE', 2 * 1024 ** 3):
+        return jsonify({'error': 'File is too large'}), 413
+    if _open_sessions(current_user.id) >= current_app.config.get('RESUMABLE_MAX_SESSIONS', 5):
+        return jsonify({'error': 'Too many uploads in progress, finish or cancel one first'}), 429
+
+    session_id = str(uuid.uuid4())
+    manifest = {
+        'owner_id': current_user.id,
+        'filename': filename,
+        'size': size,
+        'sha256': sha256,
+        'upload_type': upload_type,
+        'chunk_size': current_app.config.get('RESUMABLE_CHUNK_SIZE', 5 * 1024 * 1024),
+        'created_at': time.time()
+    }
+    os.makedirs(_session_dir(session_id))
+    with open(os.path.join(_session_dir(session_id), MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+    return jsonify(_status(session_id, manifest)), 201
+
+
+@resumable_bp.route('/api/<session_id>')
+@login_required
+def status(session_id):
+    """Chunks received so far, to resume after a disconnect"""
+    manifest = _load(session_id)
+    if manifest is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(_status(session_id, manifest))
+
+
+@resumable_bp.route('/api/<session_id>/chunks/<int:index>', methods=['PUT'])
+@login_required
+def put_chunk(session_id, index):
+    """Store one chunk from the raw request body"""
+    manifest = _load(session_id)
+    if manifest is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    if index >= _chunk_count(manifest):
+        return jsonify({'error': 'Chunk index out of range'}), 400
+
+    expected = _chunk_length(manifest, index)
+    if request.content_length is not None and request.content_length != expected:
+        return jsonify({'error': f'Chunk {index} must be {expected} bytes'}), 400
+
+    # Written beside the final name and renamed, so a dropped connection never leaves a partial chunk
+    path = os.path.join(_session_dir(session_id), str(index))
+    tmp_path = f'{path}.{uuid.uuid4().hex}.part'
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            while length <= expected:
+                data = request.stream.read(CHUNK_SIZE)
+                if not data:
+                    break
+                digest.update(data)
+                length += len(data)
+                f.write(data)
+
+        checksum = request.headers.get('X-Chunk-SHA256', '').lower()
+        if length != expected:
+            return jsonify({'error': f'Chunk {index} must be {expected} bytes'}), 400
+        if checksum and checksum != digest.hexdigest():
+            return jsonify({'error': f'Checksum mismatch for chunk {index}'}), 422
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Keeps the session alive for purge_stale()
+    os.utime(os.path.join(_session_dir(session_id), MANIFEST))
+    return jsonify({'index': index, 'sha256': digest.hexdigest()})
+
+
+@resumable_bp.route('/api/<session_id>/complete', methods=['POST'])
+@login_required
+def complete(session_id):
+    """Assemble the chunks into storage and create the Upload"""
+    manifest = _load(session_id)
+    if manifest is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    received = _received(session_id, manifest)
+    missing = sorted(set(range(_chunk_count(manifest))) - set(received))
+    if missing:
+        return jsonify({'error': 'Upload is incomplete', 'missing': missing}), 409
+
+    directory = _session_dir(session_id)
+    reader = _ChunkReader(os.path.join(directory, str(index)) for index in received)
+    try:
+        stored = store_stream(reader, file_extension(manifest['filename']))
+    finally:
+        reader.close()
+
+    if manifest['sha256'] and stored.sha256 != manifest['sha256']:
+        if not db.session.query(Upload.id).filter_by(content_hash=stored.sha256).first():
+            get_backend().delete(stored.key)
+        shutil.rmtree(directory, ignore_errors=True)
+        return jsonify({'error': 'Checksum mismatch for the assembled file'}), 422
+
+    upload = upload_for(stored, manifest['filename'], current_user.id, manifest['upload_type'])
+    queue_thumbnails(upload)
+    db.session.commit()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    return jsonify({'upload': {
+        'id': upload.id,
+        'file_path': upload.file_path,
+        'file_type': upload.file_type,
+        'file_size': upload.file_size,
+        'original_filename': upload.original_filename
+    }}), 201
+
+
+@resumable_bp.route('/api/<session_id>', methods=['DELETE'])
+@login_required
+def cancel(session_id):
+    """Abandon an upload session"""
+    if _load(session_id) is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    shutil.rmtree(_session_dir(session_id), ignore_errors=True)
+    return jsonify({'success': True})
+
+
+def purge_stale(max_age):
+    """Remove sessions without activity for `max_age` seconds. Returns the number removed."""
+    root = _root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(root):
+        directory = os.path.join(root, name)
+        try:
+            last_active = os.path.getmtime(os.path.join(directory, MANIFEST))
+        except OSError:
+            # Just created, or a leftover without a manifest
+            last_active = os.path.getmtime(directory)
+        if last_active < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def init_resumable(app):
+    """Register the stale session cleanup command"""
+    @app.cli.command('purge-stale-uploads')
+    def purge_stale_uploads_command():
+        """Remove abandoned resumable upload sessions"""
+        ttl = app.config.get('RESUMABLE_UPLOAD_TTL', 24 * 3600)
+        click.echo(f'Removed {purge_stale(ttl)} stale upload sessions')
@@ -0,0 +1,18 @@
+"""Database schema helpers for development scripts
+
+The schema is owned by the Alembic revisions in migrations/; production
+applies them with `python manage.py db upgrade`.
+"""
+from flask_migrate import upgrade
+from sqlalchemy import text
+from app import db
+
+
+def reset_database():
+    """Drop everything and rebuild the schema from migrations (destroys all data)"""
+    db.drop_all()
+    # Objects the models don't know about
+    for table in ('projects_fts', 'alembic_version'):
+        db.session.execute(text(f'DROP TABLE IF EXISTS {table}'))
+    db.session.commit()
+    upgrade()
@@ -0,0 +1,83 @@
+"""Full-text search index for project listings
+
+Postgres uses a generated tsvector column with a partial GIN index, SQLite
+uses an FTS5 table kept in sync by triggers. Both skip soft-deleted projects
+and are created by the 0003_project_search migration.
+"""
+import re
+import click
+from sqlalchemy import text, column, literal_column, func
+from app import db
+from app.models import Project
+
+def init_search(app):
+    """Pick the search backend for the configured database.
+
+    The index itself is created by migrations/versions/0003_project_search.py.
+    """
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    app.extensions['project_search'] = dialect if dialect in ('postgresql', 'sqlite') else None
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the project full-text index"""
+        click.echo(f'Indexed {rebuild_search_index()} projects')
+
+
+def rebuild_search_index():
+    """Re-index every live project (SQLite only, Postgres columns are generated)"""
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+    db.session.execute(text("DELETE FROM projects_fts;"))
+    result = db.session.execute(text("""
+        INSERT INTO projects_fts(rowid, title, description)
+        SELECT id, title, description FROM projects WHERE deleted_at IS NULL;
+    """))
+    db.session.commit()
+    return result.rowcount
+
+
+def _search_terms(search):
+    """Split user input into safe word tokens"""
+    return re.findall(r'\w+', search.lower())[:10]
+
+
+def apply_search(query, search, backend):
+    """Filter a Project query by search text.
+
+    Returns (query, rank) where rank is an orderable expression (higher is
+    better) or None when no ranking is available.
+    """
+    terms = _search_terms(search)
+    if not terms:
+        return query, None
+
+    if backend == 'postgresql':
+        # Prefix match every term: "logo des" -> logo:* & des:*
+        ts_query = func.to_tsquery('english', ' & '.join(f'{t}:*' for t in terms))
+        search_vector = literal_column('projects.search_vector')
+        query = query.filter(
+            Project.deleted_at.is_(None),
+            search_vector.op('@@')(ts_query)
+        )
+        return query, func.ts_rank(search_vector, ts_query)
+
+    if backend == 'sqlite':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        matches = text(
+            "SELECT rowid AS project_id, bm25(projects_fts, 10.0, 1.0) AS score "
+            "FROM projects_fts WHERE projects_fts MATCH :match"
+        ).bindparams(match=match).columns(
+            column('project_id'), column('score')
+        ).subquery('fts_matches')
+        query = query.join(matches, matches.c.project_id == Project.id)
+        # bm25 scores are negative, lower is more relevant
+        return query, -matches.c.score
+
+    # No index available, keep the old substring search
+    query = query.filter(
+        (Project.title.ilike(f'%{search}%')) |
+        (Project.description.ilike(f'%{search}%'))
+    )
+    return query, None
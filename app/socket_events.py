@@ -1,121 +1,248 @@
-from flask_socketio import emit, join_room, leave_room
+from flask import current_app, request
+from flask_socketio import emit, join_room, leave_room, rooms
 from flask_login import current_user
 from app import socketio, db
-from app.models import Message, Project
+from app.models import Project
+from app.message_buffer import buffer_message, save_now
+from app.notification_helpers import user_room
 from datetime import datetime
+import time
+import uuid
+
+def project_room(project_id):
+    """SocketIO room for a project's chat, shared by all worker processes"""
+    return f'project_{project_id}'
+
+
+# Chat authorization cache for this worker process:
+# (sid, project_id) -> sender details, filled once the membership check passes.
+# The entry only counts while the connection is still in the project room, and
+# invalidate_project_access() closes that room on every worker, so a stale
+# entry can never authorize a message.
+_project_access = {}
+
+
+def _cached_access(project_id):
+    """Cached sender details if this connection may post to the project"""
+    access = _project_access.get((request.sid, project_id))
+    if access and project_room(project_id) in rooms():
+        return access
+    return None
+
+
+def _check_access(project_id):
+    """Check project membership in the database and cache the result"""
+    if not current_user.is_authenticated:
+        return None
+    
+    project = db.session.get(Project, project_id) if project_id else None
+    
+    # Only the poster and the assigned creator may use the chat
+    if not project or current_user.id not in [project.posted_by_id, project.assigned_to_id]:
+        return None
+    
+    access = {
+        'user_id': current_user.id,
+        'sender_name': current_user.full_name,
+        'sender_image': current_user.profile_image or '/static/images/default-avatar.png',
+    }
+    join_room(project_room(project_id))
+    _project_access[(request.sid, project_id)] = access
+    return access
+
+
+def invalidate_project_access(project_id):
+    """Drop cached chat access after a project's membership changed.
+    
+    Clients in the room are told to rejoin (which re-runs the membership
+    check) and the room is closed on every worker through the message queue.
+    """
+    room = project_room(project_id)
+    socketio.emit('membership_changed', {'project_id': project_id}, room=room)
+    socketio.close_room(room)
+    for key in [key for key in _project_access if key[1] == project_id]:
+        _project_access.pop(key, None)
+
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     print(f'Client connected: {current_user.id if current_user.is_authenticated else "anonymous"}')
+    
+    if current_user.is_authenticated:
+        # Per-user room for pushed notification counts
+        join_room(user_room(current_user.id))
+        emit('notification_count', {'count': current_user.unread_notifications or 0})
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print(f'Client disconnected: {current_user.id if current_user.is_authenticated else "anonymous"}')
+    
+    for key in [key for key in _project_access if key[0] == request.sid]:
+        _project_access.pop(key, None)
 
 
 @socketio.on('join_room')
 def handle_join_room(data):
     """Join a project chat room"""
-    if not current_user.is_authenticated:
-        return
-    
     project_id = data.get('project_id')
-    project = Project.query.get(project_id)
-    
-    if not project:
-        return
     
-    # Check authorization
-    if current_user.id not in [project.posted_by_id, project.assigned_to_id]:
+    # Always re-check on join; this is what refreshes the cache
+    access = _check_access(project_id)
+    if not access:
         return
     
-    room = f'project_{project_id}'
-    join_room(room)
-    emit('status', {'msg': f'{current_user.full_name} has joined the chat.'}, room=room)
+    emit('status', {'msg': f'{access["sender_name"]} has joined the chat.'}, room=project_room(project_id))
 
 
 @socketio.on('leave_room')
 def handle_leave_room(data):
     """Leave a project chat room"""
-    if not current_user.is_authenticated:
+    project_id = data.get('project_id')
+    access = _project_access.pop((request.sid, project_id), None)
+    if not access:
         return
     
-    project_id = data.get('project_id')
-    room = f'project_{project_id}'
+    room = project_room(project_id)
     leave_room(room)
-    emit('status', {'msg': f'{current_user.full_name} has left the chat.'}, room=room)
+    emit('status', {'msg': f'{access["sender_name"]} has left the chat.'}, room=room)
 
 
 @socketio.on('send_message')
 def handle_send_message(data):
     """Send a message in project chat"""
-    if not current_user.is_authenticated:
-        return
-    
     project_id = data.get('project_id')
     content = data.get('content')
     attachments = data.get('attachments')  # Optional file paths
     
-    project = Project.query.get(project_id)
-    
-    if not project or not content:
+    if not content:
         return
     
-    # Check authorization
-    if current_user.id not in [project.posted_by_id, project.assigned_to_id]:
+    # Joined connections are authorized from the cache without touching the database
+    access = _cached_access(project_id) or _check_access(project_id)
+    if not access:
         return
     
-    # Create message
-    message = Message(
-        project_id=project_id,
-        sender_id=current_user.id,
-        content=content,
-        attachments=attachments
-    )
-    db.session.add(message)
-    db.session.commit()
+    # Id generated by the client, used to match acknowledgements and drop resends
+    client_id = data.get('client_id')
+    if not isinstance(client_id, str) or not 0 < len(client_id) <= 36:
+        client_id = str(uuid.uuid4())
+    
+    row = {
+        'project_id': project_id,
+        'sender_id': access['user_id'],
+        'content': content,
+        'attachments': attachments,
+        'client_id': client_id,
+        'is_read': False,
+        'created_at': datetime.utcnow()
+    }
+    room = project_room(project_id)
+    
+    message_id = None
+    if not current_app.config.get('CHAT_WRITE_BEHIND', True):
+        message_id = save_now(row, request.sid, room)
+        if message_id is None:
+            return
     
     # Broadcast to room
-    room = f'project_{project_id}'
     emit('new_message', {
-        'id': message.id,
-        'sender_id': current_user.id,
-        'sender_name': current_user.full_name,
-        'sender_image': current_user.profile_image or '/static/images/default-avatar.png',
+        'id': message_id,
+        'client_id': client_id,
+        'sender_id': access['user_id'],
+        'sender_name': access['sender_name'],
+        'sender_image': access['sender_image'],
         'content': content,
         'attachments': attachments,
-        'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
         'is_own': False  # Receivers will check this
     }, room=room)
+    
+    # Stored with the next batch; the room gets `messages_saved` once committed
+    if message_id is None:
+        buffer_message(row, request.sid, room)
+
+
+# Typing indicators, coalesced per (user_id, project_id) in this worker process:
+# key -> {'sid', 'user_name', 'room', 'emitted_at', 'expires_at'}.
+# The room hears `user_typing` at most once per TYPING_MIN_INTERVAL and one
+# `user_stop_typing` when the user stops or goes quiet for TYPING_TIMEOUT.
+_typing = {}
+_typing_sweeper_running = False
+
+
+def _emit_stop_typing(key, state):
+    socketio.emit('user_stop_typing', {'user_id': key[0]}, room=state['room'], skip_sid=state['sid'])
+
+
+def _sweep_typing(interval):
+    """Send the stop event for indicators that expired, until none are left"""
+    global _typing_sweeper_running
+    while _typing:
+        socketio.sleep(interval)
+        now = time.monotonic()
+        for key, state in list(_typing.items()):
+            if state['expires_at'] <= now and _typing.pop(key, None):
+                _emit_stop_typing(key, state)
+    _typing_sweeper_running = False
 
 
 @socketio.on('typing')
 def handle_typing(data):
     """Handle typing indicator"""
-    if not current_user.is_authenticated:
+    global _typing_sweeper_running
+    project_id = data.get('project_id')
+    access = _cached_access(project_id)
+    if not access:
         return
     
-    project_id = data.get('project_id')
-    room = f'project_{project_id}'
+    config = current_app.config
+    interval = config.get('TYPING_MIN_INTERVAL', 3.0)
+    now = time.monotonic()
+    key = (access['user_id'], project_id)
+    state = _typing.setdefault(key, {
+        'user_name': access['sender_name'],
+        'room': project_room(project_id),
+        'emitted_at': None
+    })
+    state['sid'] = request.sid
+    state['expires_at'] = now + config.get('TYPING_TIMEOUT', 5.0)
     
-    emit('user_typing', {
-        'user_id': current_user.id,
-        'user_name': current_user.full_name
-    }, room=room, include_self=False)
+    # Repeat the event only to refresh the receivers' own expiry timer
+    if state['emitted_at'] is None or now - state['emitted_at'] >= interval:
+        state['emitted_at'] = now
+        emit('user_typing', {
+            'user_id': access['user_id'],
+            'user_name': access['sender_name'],
+            'expires_in': config.get('TYPING_TIMEOUT', 5.0)
+        }, room=state['room'], include_self=False)
+    
+    if not _typing_sweeper_running:
+        _typing_sweeper_running = True
+        socketio.start_background_task(_sweep_typing, min(interval, 1.0))
 
 
 @socketio.on('stop_typing')
 def handle_stop_typing(data):
     """Handle stop typing indicator"""
-    if not current_user.is_authenticated:
+    project_id = data.get('project_id')
+    access = _cached_access(project_id)
+    if not access:
         return
     
-    project_id = data.get('project_id')
-    room = f'project_{project_id}'
+    key = (access['user_id'], project_id)
+    state = _typing.get(key)
+    if not state:
+        return
     
-    emit('user_stop_typing', {
-        'user_id': current_user.id
-    }, room=room, include_self=False)
+    interval = current_app.config.get('TYPING_MIN_INTERVAL', 3.0)
+    now = time.monotonic()
+    if now - state['emitted_at'] >= interval:
+        _typing.pop(key, None)
+        _emit_stop_typing(key, state)
+    else:
+        # Stopped within the window it started in: leave room for the user to
+        # resume, the sweeper sends the stop when the window closes
+        state['expires_at'] = state['emitted_at'] + interval
@@ -0,0 +1,78 @@
+"""SocketIO message queue wiring
+
+With SOCKETIO_MESSAGE_QUEUE set, every emit (from socket handlers, routes
+or background jobs) is published to the queue and delivered by whichever
+worker process holds the target connections, so rooms work across
+gunicorn workers and instances. Clients connect over websocket only, so
+no sticky sessions are needed in front of the workers.
+
+`memory://` selects LocalQueueManager, an in-process stand-in for tests
+and single-process development.
+"""
+import json
+import threading
+from socketio import Manager
+
+# channel -> LocalQueueManager instances attached to a server in this process
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+
+class LocalQueueManager(Manager):
+    """In-process stand-in for a message queue client manager.
+
+    Emits are JSON encoded and decoded like a real broker would do, then
+    delivered synchronously to every server manager on the same channel.
+    Unlike socketio's PubSubManager subclasses it works with Flask-SocketIO's
+    test client. Emits and close_room() are shared, like PubSubManager does;
+    disconnects and joining or leaving rooms stay local to each server.
+    """
+    name = 'memory'
+
+    def __init__(self, url='memory://', channel='socketio', write_only=False):
+        super().__init__()
+        self.channel = channel
+        self.write_only = write_only
+
+    def initialize(self):
+        super().initialize()
+        if not self.write_only:
+            with _subscribers_lock:
+                managers = _subscribers.setdefault(self.channel, [])
+                if self not in managers:
+                    managers.append(self)
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None,
+             callback=None, to=None, **kwargs):
+        room = to or room
+        namespace = namespace or '/'
+        if kwargs.get('ignore_queue'):
+            return super().emit(event, data, namespace, room=room, skip_sid=skip_sid, callback=callback)
+
+        # Round-trip through JSON so unserializable payloads fail here too
+        args = json.loads(json.dumps(list(data) if isinstance(data, tuple) else [data]))
+        data = tuple(args) if isinstance(data, tuple) else args[0]
+
+        with _subscribers_lock:
+            managers = list(_subscribers.get(self.channel, ()))
+        for manager in managers:
+            # Acknowledgement callbacks can only be run by the emitting server
+            Manager.emit(manager, event, data, namespace, room=room, skip_sid=skip_sid,
+                         callback=callback if manager is self else None)
+
+    def close_room(self, room, namespace=None):
+        with _subscribers_lock:
+            managers = list(_subscribers.get(self.channel, ()))
+        for manager in managers or [self]:
+            Manager.close_room(manager, room, namespace or '/')
+
+
+def queue_options(config):
+    """Extra socketio.init_app() arguments for the configured message queue"""
+    url = config.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+    channel = config.get('SOCKETIO_CHANNEL', 'creatilink')
+    if url.startswith('memory://'):
+        return {'client_manager': LocalQueueManager(url, channel=channel)}
+    return {'message_queue': url, 'channel': channel}
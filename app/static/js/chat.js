@@ -1,9 +1,18 @@
 // Chat room SocketIO client
 
-const socket = io();
+const socket = window.appSocket || io({ transports: ['websocket'] });
 let currentProjectId = null;
 let currentUserId = null;
 let typingTimeout = null;
+let typingIndicatorTimeout = null;
+let olderCursor = null;
+let loadingOlder = false;
+// Sent messages not yet confirmed as stored, by client id (resent after a reconnect)
+const unsavedMessages = new Map();
+// Waits before resending a message the server failed to store; after the last one it is marked failed
+const MESSAGE_RETRY_DELAYS = [1000, 3000, 10000];
+// Automatic resends so far, by client id
+const messageRetries = new Map();
 
 // Initialize chat
 function initChat(projectId, userId) {
@@ -20,18 +29,19 @@ function initChat(projectId, userId) {
     setupChatEvents();
 }
 
-// Load message history
+// Load the newest page of message history
 async function loadMessages() {
     try {
         const response = await fetch(`/chat/api/messages/${currentProjectId}`);
-        const messages = await response.json();
+        const data = await response.json();
 
         const container = document.getElementById('messages-container');
         container.innerHTML = '';
 
-        messages.forEach(msg => {
+        data.messages.forEach(msg => {
             appendMessage(msg);
         });
+        olderCursor = data.before;
 
         scrollToBottom();
     } catch (error) {
@@ -39,13 +49,46 @@ async function loadMessages() {
     }
 }
 
-// Append message to chat
-function appendMessage(message) {
+// Load the previous page when scrolled to the top
+async function loadOlderMessages() {
+    if (!olderCursor || loadingOlder) return;
+    loadingOlder = true;
+
+    try {
+        const response = await fetch(`/chat/api/messages/${currentProjectId}?before=${encodeURIComponent(olderCursor)}`);
+        const data = await response.json();
+
+        const container = document.getElementById('messages-container');
+        const previousHeight = container.scrollHeight;
+
+        // Prepend oldest-last so the page ends up in chronological order
+        data.messages.slice().reverse().forEach(msg => {
+            appendMessage(msg, true);
+        });
+        olderCursor = data.before;
+
+        // Keep the message the user was looking at in place
+        container.scrollTop += container.scrollHeight - previousHeight;
+    } catch (error) {
+        console.error('Failed to load older messages:', error);
+    } finally {
+        loadingOlder = false;
+    }
+}
+
+// Append message to chat (or prepend when loading history)
+function appendMessage(message, prepend = false) {
     const container = document.getElementById('messages-container');
     const isOwn = message.sender_id === currentUserId || message.is_own;
 
     const messageDiv = document.createElement('div');
     messageDiv.className = `flex ${isOwn ? 'justify-end' : 'justify-start'} mb-4`;
+    if (message.client_id) {
+        messageDiv.dataset.clientId = message.client_id;
+    }
+    if (message.pending) {
+        messageDiv.classList.add('opacity-60');
+    }
 
     messageDiv.innerHTML = `
         <div class="chat-bubble ${isOwn ? 'chat-bubble-sent' : 'chat-bubble-received'}">
@@ -55,7 +98,11 @@ function appendMessage(message) {
         </div>
     `;
 
-    container.appendChild(messageDiv);
+    if (prepend) {
+        container.insertBefore(messageDiv, container.firstChild);
+    } else {
+        container.appendChild(messageDiv);
+    }
 }
 
 // Send message
@@ -65,10 +112,23 @@ function sendMessage() {
 
     if (!content) return;
 
-    socket.emit('send_message', {
+    const message = {
         project_id: currentProjectId,
+        client_id: newClientId(),
         content: content
+    };
+    unsavedMessages.set(message.client_id, message);
+    socket.emit('send_message', message);
+
+    // Shown right away, faded until the server confirms it was stored
+    appendMessage({
+        client_id: message.client_id,
+        sender_id: currentUserId,
+        content: content,
+        created_at: new Date().toISOString(),
+        pending: true
     });
+    scrollToBottom();
 
     input.value = '';
     stopTyping();
@@ -78,6 +138,14 @@ function sendMessage() {
 function setupChatEvents() {
     const input = document.getElementById('message-input');
     const sendBtn = document.getElementById('send-btn');
+    const container = document.getElementById('messages-container');
+
+    // Infinite scroll for older history
+    container.addEventListener('scroll', () => {
+        if (container.scrollTop < 50) {
+            loadOlderMessages();
+        }
+    });
 
     // Send message on button click
     sendBtn.addEventListener('click', sendMessage);
@@ -110,12 +178,24 @@ function stopTyping() {
     }
 }
 
+// Mark the other participant's messages as read while the room is open
+let markReadTimeout = null;
+function markRead() {
+    clearTimeout(markReadTimeout);
+    markReadTimeout = setTimeout(() => {
+        fetch(`/chat/api/read/${currentProjectId}`, { method: 'POST' }).catch(() => { });
+    }, 1000);
+}
+
 // Socket event listeners
 socket.on('new_message', (data) => {
+    // A resent message we already show
+    if (data.client_id && document.querySelector(`[data-client-id="${data.client_id}"]`)) return;
     if (data.sender_id !== currentUserId) {
         data.is_own = false;
         appendMessage(data);
         scrollToBottom();
+        markRead();
     }
 });
 
@@ -124,16 +204,90 @@ socket.on('user_typing', (data) => {
     if (indicator && data.user_id !== currentUserId) {
         indicator.textContent = `${data.user_name} is typing...`;
         indicator.classList.remove('hidden');
+
+        // Hide on our own if the stop event never arrives
+        clearTimeout(typingIndicatorTimeout);
+        typingIndicatorTimeout = setTimeout(() => indicator.classList.add('hidden'), (data.expires_in || 5) * 1000);
     }
 });
 
 socket.on('user_stop_typing', (data) => {
     const indicator = document.getElementById('typing-indicator');
     if (indicator) {
+        clearTimeout(typingIndicatorTimeout);
         indicator.classList.add('hidden');
     }
 });
 
+// Stored messages: drop them from the resend list and un-fade our own
+socket.on('messages_saved', (data) => {
+    data.messages.forEach(saved => {
+        unsavedMessages.delete(saved.client_id);
+        messageRetries.delete(saved.client_id);
+        clearMessageFailed(saved.client_id);
+        const element = document.querySelector(`[data-client-id="${saved.client_id}"]`);
+        if (element) {
+            element.dataset.messageId = saved.id;
+            element.classList.remove('opacity-60');
+        }
+    });
+});
+
+// Not stored: resend a few times, then show it as failed with a manual retry
+socket.on('message_failed', (data) => {
+    const clientId = data.client_id;
+    if (!unsavedMessages.has(clientId)) return;
+
+    const attempt = messageRetries.get(clientId) || 0;
+    if (attempt < MESSAGE_RETRY_DELAYS.length) {
+        messageRetries.set(clientId, attempt + 1);
+        setTimeout(() => resendMessage(clientId), MESSAGE_RETRY_DELAYS[attempt]);
+    } else {
+        showMessageFailed(clientId);
+    }
+});
+
+function resendMessage(clientId) {
+    const message = unsavedMessages.get(clientId);
+    if (message) socket.emit('send_message', message);
+}
+
+function showMessageFailed(clientId) {
+    const element = document.querySelector(`[data-client-id="${clientId}"]`);
+    if (!element || element.querySelector('.message-retry')) return;
+
+    const retry = document.createElement('button');
+    retry.type = 'button';
+    retry.className = 'message-retry block text-xs text-red-500 hover:underline mt-1';
+    retry.innerHTML = '<i class="fas fa-exclamation-circle"></i> Not delivered. Tap to retry';
+    retry.addEventListener('click', () => {
+        clearMessageFailed(clientId);
+        messageRetries.delete(clientId);
+        resendMessage(clientId);
+    });
+    element.querySelector('.chat-bubble').appendChild(retry);
+}
+
+function clearMessageFailed(clientId) {
+    const element = document.querySelector(`[data-client-id="${clientId}"]`);
+    const retry = element && element.querySelector('.message-retry');
+    if (retry) retry.remove();
+}
+
+// After a reconnect: rejoin and resend anything not confirmed (resends are ignored server-side)
+socket.on('connect', () => {
+    if (!currentProjectId) return;
+    socket.emit('join_room', { project_id: currentProjectId });
+    unsavedMessages.forEach(message => socket.emit('send_message', message));
+});
+
+// Project membership changed: rejoin so the server re-checks access
+socket.on('membership_changed', (data) => {
+    if (data.project_id === currentProjectId) {
+        socket.emit('join_room', { project_id: currentProjectId });
+    }
+});
+
 socket.on('status', (data) => {
     console.log(data.msg);
 });
@@ -144,6 +298,13 @@ function scrollToBottom() {
     container.scrollTop = container.scrollHeight;
 }
 
+function newClientId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
 function escapeHtml(text) {
     const div = document.createElement('div');
     div.textContent = text;
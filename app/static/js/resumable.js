@@ -0,0 +1,122 @@
+// Chunked, resumable uploads (see app/resumable.py)
+
+// Files above this size are sent in chunks before the form is submitted
+const RESUMABLE_THRESHOLD = 8 * 1024 * 1024;
+// Waits between retries of a failed request, in milliseconds
+const RESUMABLE_RETRY_DELAYS = [1000, 2000, 5000, 10000, 30000];
+
+function resumableKey(file, uploadType) {
+    return `resumable:${uploadType}:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function sha256Hex(blob) {
+    // SubtleCrypto is only available on secure origins; the checksum is optional
+    if (!(window.crypto && crypto.subtle)) return null;
+    const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// fetch() that retries network errors, server errors and corrupted chunks
+async function resumableFetch(url, options = {}) {
+    for (let attempt = 0; ; attempt++) {
+        let response = null;
+        try {
+            response = await fetch(url, options);
+        } catch (error) {
+            // Connection dropped: retry below
+        }
+        if (response && response.status < 500 && ![422, 429].includes(response.status)) {
+            return response;
+        }
+        if (attempt >= RESUMABLE_RETRY_DELAYS.length) {
+            throw new Error('Upload failed, please check your connection and try again');
+        }
+        await new Promise(resolve => setTimeout(resolve, RESUMABLE_RETRY_DELAYS[attempt]));
+    }
+}
+
+async function resumableJSON(response) {
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Upload failed');
+    return data;
+}
+
+// Upload a file in chunks, continuing a previous attempt of the same file if the server still has it
+async function uploadResumable(file, uploadType, onProgress) {
+    const key = resumableKey(file, uploadType);
+    let session = null;
+
+    const savedId = localStorage.getItem(key);
+    if (savedId) {
+        const response = await resumableFetch(`/uploads/api/${savedId}`);
+        if (response.ok) session = await response.json();
+    }
+    if (!session) {
+        session = await resumableJSON(await resumableFetch('/uploads/api', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size, upload_type: uploadType })
+        }));
+        localStorage.setItem(key, session.id);
+    }
+
+    const received = new Set(session.received);
+    let done = received.size;
+    if (onProgress) onProgress(done / session.chunks);
+
+    for (let index = 0; index < session.chunks; index++) {
+        if (received.has(index)) continue;
+        const chunk = file.slice(index * session.chunk_size, (index + 1) * session.chunk_size);
+        const headers = { 'Content-Type': 'application/octet-stream' };
+        const checksum = await sha256Hex(chunk);
+        if (checksum) headers['X-Chunk-SHA256'] = checksum;
+
+        await resumableJSON(await resumableFetch(`/uploads/api/${session.id}/chunks/${index}`, {
+            method: 'PUT',
+            headers,
+            body: chunk
+        }));
+        done++;
+        if (onProgress) onProgress(done / session.chunks);
+    }
+
+    const result = await resumableJSON(await resumableFetch(`/uploads/api/${session.id}/complete`, { method: 'POST' }));
+    localStorage.removeItem(key);
+    return result.upload;
+}
+
+// Send the large files of a file input in chunks, then submit the form with the rest
+function setupResumableForm(formId, inputId, uploadType) {
+    const form = document.getElementById(formId);
+    const input = document.getElementById(inputId);
+    if (!form || !input) return;
+
+    form.addEventListener('submit', async (e) => {
+        const large = Array.from(input.files).filter(file => file.size > RESUMABLE_THRESHOLD);
+        if (!large.length) return;
+        e.preventDefault();
+
+        const submitBtn = form.querySelector('button[type="submit"]');
+        const originalText = submitBtn.textContent;
+        submitBtn.disabled = true;
+
+        try {
+            for (const [i, file] of large.entries()) {
+                await uploadResumable(file, uploadType, (progress) => {
+                    submitBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Uploading ${i + 1}/${large.length} (${Math.round(progress * 100)}%)`;
+                });
+            }
+        } catch (error) {
+            showToast(error.message, 'error');
+            submitBtn.disabled = false;
+            submitBtn.textContent = originalText;
+            return;
+        }
+
+        // The large files are saved already; submit the form without them
+        const rest = new DataTransfer();
+        Array.from(input.files).filter(file => file.size <= RESUMABLE_THRESHOLD).forEach(file => rest.items.add(file));
+        input.files = rest.files;
+        form.submit();
+    });
+}
@@ -0,0 +1,327 @@
+"""Content-addressed storage for uploaded files
+
+Uploads are streamed to a temporary file while being hashed, then stored
+once under their SHA-256 in a sharded key space (`ab/cd/abcd....png`), so
+identical files share one blob and no directory grows past a few hundred
+entries. Upload rows record the hash (Upload.content_hash); a file whose
+hash is already known is never written again.
+
+STORAGE_URL picks the backend:
+
+- unset: LocalStorage, blobs under UPLOAD_FOLDER/blobs, served by app/media.py
+- s3://bucket/prefix: S3Storage through boto3 (STORAGE_S3_ENDPOINT for
+  S3-compatible servers such as MinIO)
+- memory://: S3Storage with MemoryS3Client, an in-process stand-in for tests
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from io import BytesIO
+from urllib.parse import urlparse
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Upload
+
+CHUNK_SIZE = 64 * 1024
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi'}
+
+StoredFile = namedtuple('StoredFile', 'key sha256 size url')
+
+_backend = None
+
+
+def blob_key(sha256, ext):
+    """Sharded storage key for a content hash"""
+    suffix = f'.{ext}' if ext else ''
+    return f'{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}'
+
+
+def file_extension(filename):
+    filename = secure_filename(filename or '')
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def file_type(ext):
+    """'image', 'video' or 'document' for a file extension"""
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    return 'document'
+
+
+class LocalStorage:
+    """Blobs in a directory tree, linked under `base_url`.
+
+    `legacy_urls` are earlier base URLs still saved on rows.
+    """
+
+    def __init__(self, root, base_url, legacy_urls=()):
+        self.root = root
+        self.base_url = base_url.rstrip('/') + '/'
+        self.legacy_urls = [url.rstrip('/') + '/' for url in legacy_urls]
+        self.tmp_dir = os.path.join(root, 'tmp')
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, key, tmp_path):
+        """Move a finished temporary file into place"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key):
+        return f'{self.base_url}{key}'
+
+    def key_for_url(self, url):
+        for prefix in [self.base_url] + self.legacy_urls:
+            if url and url.startswith(prefix):
+                return url[len(prefix):]
+        return None
+
+
+class S3Storage:
+    """Blobs in an S3 bucket under `prefix`.
+
+    `client` needs the boto3 methods upload_file, head_object, get_object
+    and delete_object. Objects are linked as `public_url` + key, so the
+    bucket (or a CDN in front of it) must allow public reads.
+    """
+
+    def __init__(self, client, bucket, prefix, public_url, tmp_dir):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.public_url = public_url.rstrip('/') + '/'
+        self.tmp_dir = tmp_dir
+
+    def path(self, key):
+        return None
+
+    def _object(self, key):
+        return f'{self.prefix}{key}'
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object(key))
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def put(self, key, tmp_path):
+        try:
+            self.client.upload_file(tmp_path, self.bucket, self._object(key))
+        finally:
+            os.remove(tmp_path)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._object(key))['Body']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object(key))
+
+    def url(self, key):
+        return f'{self.public_url}{key}'
+
+    def key_for_url(self, url):
+        if url and url.startswith(self.public_url):
+            return url[len(self.public_url):]
+        return None
+
+
+class MissingObject(Exception):
+    """NoSuchKey in the shape botocore's ClientError reports it"""
+
+    def __init__(self, key):
+        super().__init__(f'NoSuchKey: {key}')
+        self.response = {'Error': {'Code': 'NoSuchKey'}}
+
+
+class MemoryS3Client:
+    """In-process stand-in for a boto3 S3 client (tests and development)"""
+
+    def __init__(self):
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self.objects[(bucket, key)] = data
+
+    def head_object(self, Bucket, Key):
+        with self._lock:
+            if (Bucket, Key) not in self.objects:
+                raise MissingObject(Key)
+            return {'ContentLength': len(self.objects[(Bucket, Key)])}
+
+    def get_object(self, Bucket, Key):
+        with self._lock:
+            if (Bucket, Key) not in self.objects:
+                raise MissingObject(Key)
+            return {'Body': BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+
+
+def _create_backend(config, instance_path):
+    url = config.get('STORAGE_URL')
+    tmp_dir = config.get('STORAGE_TMP_DIR') or os.path.join(instance_path, 'upload_tmp')
+
+    if not url:
+        root = os.path.join(config['UPLOAD_FOLDER'], 'blobs')
+        # Blobs were linked through the static folder before /media existed
+        return LocalStorage(root, config.get('STORAGE_BASE_URL', '/media/'), legacy_urls=['/static/uploads/blobs/'])
+
+    parsed = urlparse(url)
+    bucket = parsed.netloc or 'uploads'
+    if parsed.scheme == 'memory':
+        client = MemoryS3Client()
+        default_url = f'memory://{bucket}{parsed.path}'
+    elif parsed.scheme == 's3':
+        import boto3
+        endpoint = config.get('STORAGE_S3_ENDPOINT')
+        client = boto3.client('s3', endpoint_url=endpoint)
+        default_url = f"{(endpoint or 'https://s3.amazonaws.com').rstrip('/')}/{bucket}{parsed.path}"
+    else:
+        raise ValueError(f'Unsupported STORAGE_URL: {url}')
+    return S3Storage(client, bucket, parsed.path, config.get('STORAGE_PUBLIC_URL') or default_url, tmp_dir)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = _create_backend(current_app.config, current_app.instance_path)
+    return _backend
+
+
+def _spool(stream, tmp_dir):
+    """Copy `stream` to a temporary file, hashing it on the way. Returns (path, sha256, size)."""
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+def _known(sha256, url):
+    """True if an Upload row already references this blob"""
+    return db.session.query(Upload.id).filter(
+        Upload.content_hash == sha256, Upload.file_path == url
+    ).first() is not None
+
+
+def store_stream(stream, ext):
+    """Store the contents of a binary stream; returns a StoredFile"""
+    backend = get_backend()
+    tmp_path, sha256, size = _spool(stream, backend.tmp_dir)
+    key = blob_key(sha256, ext)
+    url = backend.url(key)
+    try:
+        # Known content skips the backend lookup (a HEAD request on S3)
+        if _known(sha256, url) or backend.exists(key):
+            os.remove(tmp_path)
+        else:
+            backend.put(key, tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredFile(key, sha256, size, url)
+
+
+def store_file(path, ext):
+    """Store a file from the local filesystem (it is left in place)"""
+    with open(path, 'rb') as f:
+        return store_stream(f, ext)
+
+
+def save_upload(file, owner_id, upload_type):
+    """Store an uploaded FileStorage and return its Upload row (added, not committed).
+
+    The same owner uploading the same content for the same purpose gets
+    their existing row back.
+    """
+    return upload_for(store_stream(file.stream, file_extension(file.filename)), file.filename, owner_id, upload_type)
+
+
+def upload_for(stored, filename, owner_id, upload_type):
+    """Upload row for a StoredFile, reusing the owner's existing row for the same content"""
+    ext = file_extension(filename)
+    upload = Upload.query.filter_by(
+        owner_id=owner_id, upload_type=upload_type, content_hash=stored.sha256, file_path=stored.url
+    ).first()
+    if upload is None:
+        upload = Upload(
+            owner_id=owner_id,
+            file_path=stored.url,
+            content_hash=stored.sha256,
+            file_type=file_type(ext),
+            file_size=stored.size,
+            original_filename=filename,
+            upload_type=upload_type
+        )
+        db.session.add(upload)
+    return upload
+
+
+def open_stored(url):
+    """Open a stored file by the URL or legacy static path saved on a row"""
+    backend = get_backend()
+    key = backend.key_for_url(url)
+    if key is not None:
+        return backend.open(key)
+    # Files saved before content-addressed storage live under the static folder
+    relative = url[len('/static/'):] if url.startswith('/static/') else url.lstrip('/')
+    return open(os.path.join(current_app.static_folder, relative), 'rb')
+
+
+def media_url(value):
+    """Template filter: link for a stored file URL or a legacy static-relative path"""
+    if not value:
+        return ''
+    if value.startswith(('/', 'http://', 'https://', 'memory://')):
+        return value
+    return f'/static/{value}'
+
+
+def init_storage(app):
+    """Create the storage backend and register the media_url filter"""
+    global _backend
+    _backend = _create_backend(app.config, app.instance_path)
+    app.jinja_env.filters['media_url'] = media_url
@@ -0,0 +1,107 @@
+"""Background tasks run by app/jobs.py workers"""
+from io import BytesIO
+from flask import current_app
+from PIL import Image, ImageOps
+from app import db
+from app.creator_stats import refresh_response_times
+from app.jobs import task
+from app.models import Transaction, Upload, User
+from app.notification_helpers import notify_many
+from app.resumable import purge_stale
+from app.storage import open_stored, store_stream
+from app.thumbnails import generate as generate_thumbnails
+
+# Longest side of a processed payment screenshot, in pixels
+SCREENSHOT_MAX_SIZE = 1600
+SCREENSHOT_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+
+# Creator directory response times are refreshed hourly
+CREATOR_STATS_REFRESH_SECONDS = 3600
+# Abandoned resumable upload sessions are looked for hourly
+UPLOAD_PURGE_SECONDS = 3600
+
+
+@task('notifications.send')
+def send_notifications(notifications):
+    """Write a batch of notifications (dicts of create_notification arguments)"""
+    notify_many(notifications)
+
+
+@task('notifications.admins')
+def notify_admins(notification_type, title, message, project_id=None, transaction_id=None):
+    """Fan a notification out to every admin"""
+    admin_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+        User.is_admin.is_(True), User.is_active.is_(True)
+    ).all()]
+    notify_many({
+        'user_id': user_id,
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'project_id': project_id,
+        'transaction_id': transaction_id
+    } for user_id in admin_ids)
+
+
+@task('payments.process_screenshot')
+def process_payment_screenshot(transaction_id):
+    """Normalize an uploaded payment screenshot: apply EXIF rotation, downscale, strip metadata.
+
+    Blobs are content-addressed, so the result is stored as a new blob that
+    replaces the original on the transaction and its Upload row.
+    """
+    transaction = Transaction.query.get(transaction_id)
+    if not transaction or not transaction.payment_screenshot:
+        return
+
+    original = transaction.payment_screenshot
+    ext = original.rsplit('.', 1)[-1].lower()
+    if ext not in SCREENSHOT_IMAGE_EXTENSIONS:
+        return
+
+    try:
+        with open_stored(original) as source:
+            data = BytesIO(source.read())
+    except FileNotFoundError:
+        return
+
+    with Image.open(data) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((SCREENSHOT_MAX_SIZE, SCREENSHOT_MAX_SIZE))
+        if ext in ('jpg', 'jpeg') and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        processed = BytesIO()
+        image.save(processed, format=Image.registered_extensions()[f'.{ext}'], optimize=True)
+
+    processed.seek(0)
+    stored = store_stream(processed, ext)
+    if stored.url == original:
+        return
+
+    Upload.query.filter_by(
+        owner_id=transaction.customer_id, upload_type='payment', file_path=original
+    ).update({'file_path': stored.url, 'content_hash': stored.sha256, 'file_size': stored.size})
+    transaction.payment_screenshot = stored.url
+    db.session.commit()
+
+
+@task('uploads.thumbnails')
+def make_thumbnails(upload_id):
+    """Resized WebP/JPEG copies of an uploaded image"""
+    upload = Upload.query.get(upload_id)
+    if not upload:
+        return
+    generate_thumbnails(upload)
+    db.session.commit()
+
+
+@task('creators.refresh_stats', every=CREATOR_STATS_REFRESH_SECONDS)
+def refresh_stats():
+    """Recompute creator chat response times for the directory"""
+    refresh_response_times()
+
+
+@task('uploads.purge_stale', every=UPLOAD_PURGE_SECONDS)
+def purge_stale_uploads():
+    """Remove resumable upload sessions idle for RESUMABLE_UPLOAD_TTL"""
+    purge_stale(current_app.config.get('RESUMABLE_UPLOAD_TTL', 24 * 3600))
@@ -0,0 +1,132 @@
+"""Resized copies of uploaded images
+
+Portfolio and profile images get WebP and JPEG copies in THUMBNAIL_WIDTHS
+(narrower than the original only), generated by the `uploads.thumbnails`
+background task and recorded as UploadDerivative rows. Templates pick a
+size with the `srcset` filter; profile images are switched to their
+smallest WebP copy, since avatars are never shown large.
+
+Derivative files are content-addressed blobs (app/storage.py), and an
+image whose content already has derivatives reuses them instead of
+being resized again.
+"""
+from io import BytesIO
+from flask import current_app
+from PIL import Image, ImageOps
+from app import db
+from app.jobs import enqueue
+from app.models import Upload, UploadDerivative, User
+from app.storage import open_stored, store_stream
+
+THUMBNAIL_UPLOAD_TYPES = {'portfolio', 'profile'}
+# Animated GIFs would lose their animation
+THUMBNAIL_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def wants_thumbnails(upload):
+    ext = upload.file_path.rsplit('.', 1)[-1].lower()
+    return upload.upload_type in THUMBNAIL_UPLOAD_TYPES and ext in THUMBNAIL_EXTENSIONS
+
+
+def queue_thumbnails(upload):
+    """Queue derivative generation for a saved Upload (caller commits)"""
+    if not wants_thumbnails(upload) or upload.derivatives:
+        return
+    db.session.flush()
+    enqueue('uploads.thumbnails', upload_id=upload.id)
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # Flatten transparency onto white instead of black
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if image.mode == 'RGBA' else None)
+        image = background
+    buffered = BytesIO()
+    image.save(buffered, **FORMATS[fmt])
+    buffered.seek(0)
+    return buffered
+
+
+def _copy_from_twin(upload):
+    """Reuse the derivatives of another upload with the same content. Returns True if found."""
+    twin = Upload.query.filter(
+        Upload.content_hash == upload.content_hash,
+        Upload.id != upload.id,
+        Upload.derivatives.any()
+    ).first()
+    if twin is None:
+        return False
+    for derivative in twin.derivatives:
+        upload.derivatives.append(UploadDerivative(
+            format=derivative.format,
+            width=derivative.width,
+            height=derivative.height,
+            file_path=derivative.file_path,
+            file_size=derivative.file_size
+        ))
+    return True
+
+
+def _render(upload):
+    widths = current_app.config.get('THUMBNAIL_WIDTHS', (320, 640, 1280))
+    with open_stored(upload.file_path) as source:
+        data = BytesIO(source.read())
+
+    with Image.open(data) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        # At least one copy, so even small images lose their EXIF data and get a WebP version
+        sizes = [width for width in widths if width < image.width] or [image.width]
+        for width in sizes:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+            for fmt in FORMATS:
+                stored = store_stream(_encode(resized, fmt), fmt)
+                upload.derivatives.append(UploadDerivative(
+                    format=fmt,
+                    width=width,
+                    height=height,
+                    file_path=stored.url,
+                    file_size=stored.size
+                ))
+
+
+def generate(upload):
+    """Create the derivatives of an image Upload (caller commits)"""
+    if upload.derivatives or not wants_thumbnails(upload):
+        return
+    if not (upload.content_hash and _copy_from_twin(upload)):
+        _render(upload)
+
+    if upload.upload_type == 'profile':
+        owner = db.session.get(User, upload.owner_id)
+        # Only if the user is still showing this image
+        if owner and owner.profile_image == upload.file_path:
+            owner.profile_image = avatar_url(upload)
+
+
+def srcset_candidates(upload, fmt):
+    return [d for d in upload.derivatives if d.format == fmt]
+
+
+def avatar_url(upload):
+    """Smallest WebP copy of a profile image, or the original until it exists"""
+    candidates = srcset_candidates(upload, 'webp')
+    return candidates[0].file_path if candidates else upload.file_path
+
+
+def srcset(upload, fmt='webp'):
+    """Template filter: srcset attribute value for an upload's derivatives in `fmt`"""
+    return ', '.join(f'{d.file_path} {d.width}w' for d in srcset_candidates(upload, fmt))
+
+
+def init_thumbnails(app):
+    """Register the srcset template filter"""
+    app.jinja_env.filters['srcset'] = srcset
@@ -0,0 +1,185 @@
+"""Short-lived cache of users for Flask-Login's user_loader
+
+Every authenticated request and socket event used to load current_user
+with a query. The column values of recently seen users are now kept for
+USER_CACHE_TTL seconds, in a per-process LRU or, with USER_CACHE_URL set,
+in Redis shared by all workers. A hit is merged into the session with
+load=False: no SELECT, but it is still a regular persistent User, so
+relationships load and attribute changes are flushed as before.
+
+Only CACHED_FIELDS are kept, as JSON: no password hash or payment
+details ever leave the database. Other columns of a cached user load
+lazily with a SELECT the first time they are read (login and password
+checks query the user directly anyway).
+
+Entries are dropped after any transaction that changes a user commits:
+ORM edits (profile, bans, role and admin changes) are picked up at flush,
+bulk UPDATEs such as the notification counters call invalidate_on_commit().
+With the in-process backend other workers only notice at expiry, so
+multi-worker deployments should set USER_CACHE_URL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models import User
+
+PENDING_INVALIDATIONS = 'user_cache_invalidations'
+
+# Columns read on almost every request (navbar, role and admin checks, chat
+# identity). JSON-serializable values only.
+CACHED_FIELDS = (
+    'id', 'full_name', 'role', 'domain', 'location', 'rating', 'total_reviews',
+    'profile_image', 'is_active', 'is_admin', 'unread_notifications'
+)
+
+_cache = None
+
+
+class LocalUserCache:
+    """Per-process LRU with a fixed time to live"""
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+
+class RedisUserCache:
+    """Cache shared by every worker; errors count as misses"""
+
+    def __init__(self, url, ttl, prefix='creatilink:user:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, user_id):
+        try:
+            data = self.client.get(f'{self.prefix}{user_id}')
+        except Exception as e:
+            print(f"⚠️ User cache unavailable: {e}")
+            return None
+        if not data:
+            return None
+        try:
+            values = json.loads(data)
+        except ValueError:
+            return None
+        # Anything else in a shared store is ignored rather than trusted
+        if not isinstance(values, dict) or set(values) != set(CACHED_FIELDS):
+            return None
+        return values
+
+    def set(self, user_id, values):
+        try:
+            self.client.setex(f'{self.prefix}{user_id}', max(int(self.ttl), 1), json.dumps(values))
+        except Exception as e:
+            print(f"⚠️ User cache unavailable: {e}")
+
+    def delete(self, user_ids):
+        if not user_ids:
+            return
+        try:
+            self.client.delete(*[f'{self.prefix}{user_id}' for user_id in user_ids])
+        except Exception as e:
+            print(f"⚠️ User cache unavailable: {e}")
+
+
+def _snapshot(user):
+    return {field: getattr(user, field) for field in CACHED_FIELDS}
+
+
+def load_cached_user(user_id):
+    """user_loader implementation: the user from the cache, or from the database"""
+    if _cache is None:
+        return db.session.get(User, user_id)
+
+    values = _cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            _cache.set(user_id, _snapshot(user))
+        return user
+
+    # Rebuild the user as if it had just been loaded, then attach it without a
+    # query; the columns left out stay unloaded and are fetched on first access
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def invalidate_user(*user_ids):
+    """Drop users from the cache right away"""
+    if _cache is not None:
+        _cache.delete(user_ids)
+
+
+def invalidate_on_commit(user_ids):
+    """Drop users from the cache once the current transaction commits"""
+    db.session.info.setdefault(PENDING_INVALIDATIONS, set()).update(user_ids)
+
+
+def _before_flush(session, flush_context, instances):
+    changed = {
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if changed:
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(changed)
+
+
+def _after_commit(session):
+    user_ids = session.info.pop(PENDING_INVALIDATIONS, None)
+    if user_ids:
+        invalidate_user(*user_ids)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+def init_user_cache(app):
+    """Pick the cache backend and register the invalidation hooks"""
+    global _cache
+    ttl = app.config.get('USER_CACHE_TTL', 60)
+    url = app.config.get('USER_CACHE_URL')
+    if ttl <= 0:
+        _cache = None
+    elif url:
+        _cache = RedisUserCache(url, ttl)
+    else:
+        _cache = LocalUserCache(ttl, app.config.get('USER_CACHE_SIZE', 1000))
+
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -19,15 +19,83 @@ class Config:
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'pdf', 'doc', 'docx'}
     
+    # Content-addressed upload storage (app/storage.py). Unset: UPLOAD_FOLDER/blobs.
+    # s3://bucket/prefix needs boto3; STORAGE_S3_ENDPOINT points it at an
+    # S3-compatible server and STORAGE_PUBLIC_URL overrides the object links.
+    # memory:// is an in-process stand-in for tests.
+    STORAGE_URL = os.environ.get('STORAGE_URL')
+    STORAGE_S3_ENDPOINT = os.environ.get('STORAGE_S3_ENDPOINT')
+    STORAGE_PUBLIC_URL = os.environ.get('STORAGE_PUBLIC_URL')
+    # Stored uploads are served from /media (app/media.py). MEDIA_SENDFILE=x-accel-redirect
+    # hands the transfer to nginx through an internal location at MEDIA_ACCEL_PREFIX
+    # aliased to UPLOAD_FOLDER/blobs; x-sendfile does the same for Apache/lighttpd.
+    MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE')
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/_media/')
+    MEDIA_MAX_AGE = 365 * 24 * 3600
+    # Chunked, resumable uploads (app/resumable.py). Chunks must stay below
+    # MAX_CONTENT_LENGTH; sessions idle for RESUMABLE_UPLOAD_TTL seconds are
+    # removed by the hourly `uploads.purge_stale` job.
+    RESUMABLE_UPLOAD_DIR = os.environ.get('RESUMABLE_UPLOAD_DIR')  # default: instance/resumable_uploads
+    RESUMABLE_CHUNK_SIZE = 5 * 1024 * 1024
+    RESUMABLE_MAX_SIZE = int(os.environ.get('RESUMABLE_MAX_SIZE', 2 * 1024 ** 3))
+    RESUMABLE_UPLOAD_TTL = 24 * 3600
+    # Open sessions per user; more get 429 until one completes or goes stale
+    RESUMABLE_MAX_SESSIONS = int(os.environ.get('RESUMABLE_MAX_SESSIONS', 5))
+    # Widths of the resized copies made of portfolio and profile images
+    THUMBNAIL_WIDTHS = (320, 640, 1280)
+    
     # Stripe settings
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY') or ''
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY') or ''
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET') or ''
     
     # SocketIO settings
+    # Required when running more than one worker/instance, e.g. redis://...
+    # (memory:// is an in-process stand-in for tests)
     SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'creatilink')
     SOCKETIO_ASYNC_MODE = 'eventlet'
     
+    # Database connection pool (Postgres only; SQLite uses SQLAlchemy's defaults).
+    # DB_POOL_MODE=null opens a fresh connection for every checkout.
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds, below server idle timeouts
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') != '0'
+    
+    # Background jobs: in-process workers per web process (0 = use `python manage.py worker`)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    
+    # Chat messages are broadcast at once and inserted in batches of up to
+    # CHAT_BATCH_SIZE, at most CHAT_FLUSH_INTERVAL seconds later.
+    # CHAT_WRITE_BEHIND=0 commits each message before broadcasting it.
+    CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND', '1') != '0'
+    CHAT_BATCH_SIZE = int(os.environ.get('CHAT_BATCH_SIZE', 50))
+    CHAT_FLUSH_INTERVAL = float(os.environ.get('CHAT_FLUSH_INTERVAL', 0.005))
+    
+    # Typing indicators: at most one `user_typing` per user and chat every
+    # TYPING_MIN_INTERVAL seconds, cleared after TYPING_TIMEOUT seconds of silence
+    TYPING_MIN_INTERVAL = float(os.environ.get('TYPING_MIN_INTERVAL', 3.0))
+    TYPING_TIMEOUT = float(os.environ.get('TYPING_TIMEOUT', 5.0))
+    
+    # Users cached for Flask-Login's user_loader (0 disables). Set
+    # USER_CACHE_URL (redis://...) to share the cache between workers.
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1000))
+    USER_CACHE_URL = os.environ.get('USER_CACHE_URL')
+    
+    # Seconds main.index keeps its queries and anonymous page cached (0 disables)
+    LANDING_CACHE_TTL = float(os.environ.get('LANDING_CACHE_TTL', 60))
+    
+    # Rendered UPI QR codes: in-memory LRU size and on-disk cache directory
+    # (default: instance/qr_cache). QR_INLINE=1 returns base64 data URLs.
+    QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 256))
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR')
+    QR_INLINE = os.environ.get('QR_INLINE', '0') == '1'
+    
     # Google OAuth settings
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -35,11 +103,25 @@ class Config:
     # Pagination
     PROJECTS_PER_PAGE = 12
     MESSAGES_PER_PAGE = 50
+    CREATORS_PER_PAGE = 24
     
     # Admin email
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL') or 'admin@creatilink.com'
 
 
+def engine_options(cfg):
+    """SQLALCHEMY_ENGINE_OPTIONS for the pool settings of a config class"""
+    if cfg.DB_POOL_MODE == 'null':
+        return {'poolclass': NullPool}
+    return {
+        'pool_size': cfg.DB_POOL_SIZE,
+        'max_overflow': cfg.DB_MAX_OVERFLOW,
+        'pool_timeout': cfg.DB_POOL_TIMEOUT,
+        'pool_recycle': cfg.DB_POOL_RECYCLE,
+        'pool_pre_ping': cfg.DB_POOL_PRE_PING,
+    }
+
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -48,10 +130,8 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
-    # Use NullPool to avoid connection pool threading issues with eventlet
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'poolclass': NullPool,
-    }
+    # Pooled connections are green-thread safe, see app/db_pool.py
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config)
 
 
 
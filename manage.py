@@ -1,16 +1,24 @@
 import os
+import sys
+from flask_migrate.cli import db as db_command
+from sqlalchemy import inspect
 from app import create_app, socketio, db
 
 # Get config from environment
 config_name = os.getenv('FLASK_ENV', 'default')
 app = create_app(config_name)
 
+# `python manage.py db upgrade` applies pending migrations
+app.cli.add_command(db_command)
+
 # Auto-seed database for free tier (must be after app creation)
 with app.app_context():
     from app.models import User
-    admin = User.query.filter_by(email='admin@creatilink.com').first()
+    # Nothing to seed until `db upgrade` has created the schema
+    schema_ready = inspect(db.engine).has_table('users')
+    admin = User.query.filter_by(email='admin@creatilink.com').first() if schema_ready else None
     
-    if not admin:
+    if schema_ready and not admin:
         print("=" * 50)
         print("Database is empty, initializing...")
         print("=" * 50)
@@ -53,12 +61,17 @@ with app.app_context():
         print("=" * 50)
 
 if __name__ == '__main__':
-    # Use socketio.run instead of app.run for WebSocket support
-    socketio.run(
-        app,
-        debug=True,
-        host='0.0.0.0',
-        port=5000,
-        use_reloader=True,
-        log_output=True
-    )
+    if len(sys.argv) > 1:
+        # Management commands, e.g. `python manage.py rebuild-metrics`
+        with app.app_context():
+            app.cli.main(args=sys.argv[1:], prog_name='manage.py')
+    else:
+        # Use socketio.run instead of app.run for WebSocket support
+        socketio.run(
+            app,
+            debug=True,
+            host='0.0.0.0',
+            port=5000,
+            use_reloader=True,
+            log_output=True
+        )
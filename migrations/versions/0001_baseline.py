@@ -0,0 +1,283 @@
+"""Baseline schema
+
+Creates every table that existed when schema management moved out of
+create_app(). Databases created by the old db.create_all() startup code
+already have most of these tables, so each one is only created if missing.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 01:28:35.279124
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing('daily_metrics'):
+        op.create_table('daily_metrics',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('new_users', sa.Integer(), nullable=False),
+        sa.Column('new_customers', sa.Integer(), nullable=False),
+        sa.Column('new_creators', sa.Integer(), nullable=False),
+        sa.Column('users_deactivated', sa.Integer(), nullable=False),
+        sa.Column('projects_created', sa.Integer(), nullable=False),
+        sa.Column('projects_open', sa.Integer(), nullable=False),
+        sa.Column('projects_active', sa.Integer(), nullable=False),
+        sa.Column('projects_completed', sa.Integer(), nullable=False),
+        sa.Column('project_budget_total', sa.Float(), nullable=False),
+        sa.Column('transactions_created', sa.Integer(), nullable=False),
+        sa.Column('transactions_completed', sa.Integer(), nullable=False),
+        sa.Column('completed_amount', sa.Float(), nullable=False),
+        sa.Column('pending_amount', sa.Float(), nullable=False),
+        sa.Column('refunded_amount', sa.Float(), nullable=False),
+        sa.Column('disputes_opened', sa.Integer(), nullable=False),
+        sa.Column('disputes_resolved', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+        )
+
+    if _missing('jobs'):
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('jobs', schema=None) as batch_op:
+            batch_op.create_index('idx_jobs_ready', ['status', 'run_at'], unique=False)
+
+    if _missing('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('domain', sa.String(length=50), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('skills', sa.Text(), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('total_reviews', sa.Integer(), nullable=True),
+        sa.Column('upi_id', sa.String(length=100), nullable=True),
+        sa.Column('profile_image', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+
+    if _missing('packages'):
+        op.create_table('packages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('tier', sa.String(length=20), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('delivery_days', sa.Integer(), nullable=False),
+        sa.Column('revisions', sa.Integer(), nullable=True),
+        sa.Column('features', sa.Text(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('projects'):
+        op.create_table('projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('budget', sa.Float(), nullable=False),
+        sa.Column('deadline', sa.Date(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('posted_by_id', sa.Integer(), nullable=False),
+        sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_by_id', sa.Integer(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('deletion_reason', sa.String(length=200), nullable=True),
+        sa.Column('creator_left', sa.Boolean(), nullable=True),
+        sa.Column('creator_left_at', sa.DateTime(), nullable=True),
+        sa.Column('delivery_link', sa.String(length=500), nullable=True),
+        sa.Column('delivery_note', sa.Text(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assigned_to_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['deleted_by_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['posted_by_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('uploads'):
+        op.create_table('uploads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=255), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=True),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('original_filename', sa.String(length=255), nullable=True),
+        sa.Column('upload_type', sa.String(length=50), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('applications'):
+        op.create_table('applications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('quote', sa.Float(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('delivery_days', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('messages'):
+        op.create_table('messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('attachments', sa.Text(), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('messages', schema=None) as batch_op:
+            batch_op.create_index('idx_messages_history', ['project_id', 'created_at', 'id'], unique=False)
+            batch_op.create_index('idx_messages_unread', ['project_id', 'is_read', 'sender_id'], unique=False)
+
+    if _missing('reviews'):
+        op.create_table('reviews',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('reviewer_id', sa.Integer(), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.ForeignKeyConstraint(['reviewer_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('transactions'):
+        op.create_table('transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('stripe_session_id', sa.String(length=255), nullable=True),
+        sa.Column('stripe_payment_intent', sa.String(length=255), nullable=True),
+        sa.Column('provider_payload', sa.Text(), nullable=True),
+        sa.Column('customer_confirmed', sa.Boolean(), nullable=True),
+        sa.Column('creator_confirmed', sa.Boolean(), nullable=True),
+        sa.Column('payment_confirmed_at', sa.DateTime(), nullable=True),
+        sa.Column('payment_screenshot', sa.String(length=500), nullable=True),
+        sa.Column('screenshot_uploaded_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('disputes'):
+        op.create_table('disputes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=False),
+        sa.Column('raised_by_id', sa.Integer(), nullable=False),
+        sa.Column('dispute_type', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('evidence_files', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('resolution_notes', sa.Text(), nullable=True),
+        sa.Column('resolved_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['raised_by_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['resolved_by_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('notifications'):
+        op.create_table('notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('notifications')
+    op.drop_table('disputes')
+    op.drop_table('transactions')
+    op.drop_table('reviews')
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index('idx_messages_unread')
+        batch_op.drop_index('idx_messages_history')
+
+    op.drop_table('messages')
+    op.drop_table('applications')
+    op.drop_table('uploads')
+    op.drop_table('projects')
+    op.drop_table('packages')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_jobs_ready')
+
+    op.drop_table('jobs')
+    op.drop_table('daily_metrics')
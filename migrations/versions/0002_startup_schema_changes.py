@@ -0,0 +1,92 @@
+"""Columns and indexes previously added by create_app() on every start
+
+Ports the ALTER TABLE / CREATE INDEX statements and information_schema
+probes from the old startup block in app/__init__.py (and the one-off
+scripts that used to live in migrations/). Everything is conditional, so
+this is a no-op on databases created by 0001_baseline and only fills in
+whatever an older deployment is missing.
+
+Revision ID: 0002_startup_schema_changes
+Revises: 0001_baseline
+Create Date: 2026-10-18 01:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_startup_schema_changes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = {
+    'projects': [
+        sa.Column('delivery_link', sa.String(length=500), nullable=True),
+        sa.Column('delivery_note', sa.Text(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_by_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('deletion_reason', sa.String(length=200), nullable=True),
+        sa.Column('creator_left', sa.Boolean(), server_default=sa.false(), nullable=True),
+        sa.Column('creator_left_at', sa.DateTime(), nullable=True),
+    ],
+    'users': [
+        sa.Column('upi_id', sa.String(length=100), nullable=True),
+        sa.Column('google_id', sa.String(length=255), nullable=True),
+        sa.Column('auth_provider', sa.String(length=20), server_default='email', nullable=True),
+        sa.Column('profile_picture', sa.String(length=500), nullable=True),
+    ],
+    'transactions': [
+        sa.Column('customer_confirmed', sa.Boolean(), server_default=sa.false(), nullable=True),
+        sa.Column('creator_confirmed', sa.Boolean(), server_default=sa.false(), nullable=True),
+        sa.Column('payment_confirmed_at', sa.DateTime(), nullable=True),
+        sa.Column('payment_screenshot', sa.String(length=500), nullable=True),
+        sa.Column('screenshot_uploaded_at', sa.DateTime(), nullable=True),
+    ],
+}
+
+# (name, table, columns, unique)
+INDEXES = [
+    ('idx_disputes_transaction', 'disputes', ['transaction_id'], False),
+    ('idx_disputes_raised_by', 'disputes', ['raised_by_id'], False),
+    ('idx_disputes_status', 'disputes', ['status'], False),
+    ('idx_messages_unread', 'messages', ['project_id', 'is_read', 'sender_id'], False),
+    ('idx_messages_history', 'messages', ['project_id', 'created_at', 'id'], False),
+    # Older databases also have the users_google_id_key constraint from ADD COLUMN ... UNIQUE
+    ('idx_users_google_id', 'users', ['google_id'], True),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for table, columns in COLUMNS.items():
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        missing = [c for c in columns if c.name not in existing]
+        if missing:
+            with op.batch_alter_table(table) as batch_op:
+                for column in missing:
+                    batch_op.add_column(column)
+
+    for name, table, columns, unique in INDEXES:
+        if name not in {i['name'] for i in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=unique)
+
+    # Persisted unread notification counter, backfilled from the notifications table
+    if 'unread_notifications' not in {c['name'] for c in inspector.get_columns('users')}:
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False))
+        op.execute("""
+            UPDATE users SET unread_notifications = (
+                SELECT COUNT(*) FROM notifications
+                WHERE notifications.user_id = users.id AND notifications.is_read = FALSE
+            )
+        """)
+
+
+def downgrade():
+    # These columns predate versioned migrations; 0001_baseline owns the tables
+    pass
@@ -0,0 +1,92 @@
+"""Full-text search index for project listings
+
+Postgres gets a generated, weighted tsvector column with a partial GIN
+index; SQLite gets an FTS5 table kept in sync by triggers. Moved here from
+app/search.py, which used to create them in create_app().
+
+Revision ID: 0003_project_search
+Revises: 0002_startup_schema_changes
+Create Date: 2026-10-18 01:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_project_search'
+down_revision = '0002_startup_schema_changes'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts
+    USING fts5(title, description, tokenize='porter unicode61');
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects
+    WHEN new.deleted_at IS NULL
+    BEGIN
+        INSERT INTO projects_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF title, description, deleted_at ON projects
+    BEGIN
+        DELETE FROM projects_fts WHERE rowid = old.id;
+        INSERT INTO projects_fts(rowid, title, description)
+        SELECT new.id, new.title, new.description WHERE new.deleted_at IS NULL;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects
+    BEGIN
+        DELETE FROM projects_fts WHERE rowid = old.id;
+    END;
+    """,
+]
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_projects_search ON projects
+    USING GIN (search_vector) WHERE deleted_at IS NULL;
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_SETUP:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        exists = sa.inspect(op.get_bind()).has_table('projects_fts')
+        for statement in SQLITE_SETUP:
+            op.execute(statement)
+        if not exists:
+            # Index the projects that already exist
+            op.execute("""
+                INSERT INTO projects_fts(rowid, title, description)
+                SELECT id, title, description FROM projects WHERE deleted_at IS NULL;
+            """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_projects_search;")
+        op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS search_vector;")
+    elif dialect == 'sqlite':
+        for trigger in ('projects_fts_insert', 'projects_fts_update', 'projects_fts_delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+        op.execute("DROP TABLE IF EXISTS projects_fts;")
@@ -0,0 +1,38 @@
+"""Client-generated ids for chat messages
+
+Chat clients tag each message with an id before sending it. The server
+broadcasts and persists it in write-behind batches (app/message_buffer.py);
+the unique (sender_id, client_id) index makes a resend after a reconnect
+a no-op instead of a duplicate message.
+
+Revision ID: 0004_message_client_id
+Revises: 0003_project_search
+Create Date: 2026-10-18 03:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_message_client_id'
+down_revision = '0003_project_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'client_id' not in {c['name'] for c in inspector.get_columns('messages')}:
+        with op.batch_alter_table('messages') as batch_op:
+            batch_op.add_column(sa.Column('client_id', sa.String(length=36), nullable=True))
+
+    if 'idx_messages_client_id' not in {i['name'] for i in inspector.get_indexes('messages')}:
+        op.create_index('idx_messages_client_id', 'messages', ['sender_id', 'client_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('idx_messages_client_id', table_name='messages')
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('client_id')
@@ -0,0 +1,61 @@
+"""Running per-creator review aggregate
+
+Adds creator_ratings (review count, rating sum and a per-star histogram)
+and fills it from the reviews table. users.rating and total_reviews are
+recomputed from the same aggregate so both start out consistent.
+
+Revision ID: 0005_creator_ratings
+Revises: 0004_message_client_id
+Create Date: 2026-10-18 04:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_creator_ratings'
+down_revision = '0004_message_client_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('creator_ratings'):
+        return
+
+    op.create_table('creator_ratings',
+    sa.Column('creator_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('stars_1', sa.Integer(), nullable=False),
+    sa.Column('stars_2', sa.Integer(), nullable=False),
+    sa.Column('stars_3', sa.Integer(), nullable=False),
+    sa.Column('stars_4', sa.Integer(), nullable=False),
+    sa.Column('stars_5', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('creator_id')
+    )
+
+    op.execute("""
+        INSERT INTO creator_ratings (creator_id, review_count, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT creator_id, COUNT(*), SUM(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+        FROM reviews
+        GROUP BY creator_id
+    """)
+    op.execute("""
+        UPDATE users SET
+            total_reviews = (SELECT review_count FROM creator_ratings WHERE creator_id = users.id),
+            rating = (SELECT ROUND(rating_sum * 1.0 / review_count, 2)
+                      FROM creator_ratings WHERE creator_id = users.id)
+        WHERE id IN (SELECT creator_id FROM creator_ratings)
+    """)
+
+
+def downgrade():
+    op.drop_table('creator_ratings')
@@ -0,0 +1,100 @@
+"""Creator directory: stats, normalized skills and filter indexes
+
+Adds creator_stats and creator_skills (see app/creator_stats.py) and the
+users indexes the directory filters on. Completed project counts and
+skills are filled here; chat response times are left for
+`python manage.py refresh-creator-stats`.
+
+Revision ID: 0006_creator_directory
+Revises: 0005_creator_ratings
+Create Date: 2026-10-18 04:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_creator_directory'
+down_revision = '0005_creator_ratings'
+branch_labels = None
+depends_on = None
+
+
+def _parse_skills(skills):
+    # Same rules as app.creator_stats.parse_skills, kept here so the
+    # migration does not depend on application code
+    import json
+    if not skills:
+        return []
+    values = None
+    if skills.lstrip().startswith('['):
+        try:
+            values = json.loads(skills)
+        except ValueError:
+            pass
+    if not isinstance(values, list):
+        values = skills.split(',')
+    seen = []
+    for value in values:
+        skill = str(value).strip().lower()[:50]
+        if skill and skill not in seen:
+            seen.append(skill)
+    return seen
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('creator_stats'):
+        op.create_table('creator_stats',
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('completed_projects', sa.Integer(), nullable=False),
+        sa.Column('response_count', sa.Integer(), nullable=False),
+        sa.Column('response_seconds_total', sa.Float(), nullable=False),
+        sa.Column('avg_response_seconds', sa.Float(), nullable=True),
+        sa.Column('responses_updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('creator_id')
+        )
+        op.create_index('idx_creator_stats_completed', 'creator_stats', ['completed_projects'], unique=False)
+        op.execute("""
+            INSERT INTO creator_stats (creator_id, completed_projects, response_count, response_seconds_total)
+            SELECT users.id, COUNT(projects.id), 0, 0
+            FROM users LEFT OUTER JOIN projects
+                ON projects.assigned_to_id = users.id AND projects.status = 'completed'
+            WHERE users.role = 'creator'
+            GROUP BY users.id
+        """)
+
+    if not inspector.has_table('creator_skills'):
+        op.create_table('creator_skills',
+        sa.Column('skill', sa.String(length=50), nullable=False),
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('skill', 'creator_id')
+        )
+        op.create_index(op.f('ix_creator_skills_creator_id'), 'creator_skills', ['creator_id'], unique=False)
+
+        creator_skills = sa.table('creator_skills', sa.column('skill'), sa.column('creator_id'))
+        rows = bind.execute(sa.text("SELECT id, skills FROM users WHERE role = 'creator' AND skills IS NOT NULL"))
+        skill_rows = [{'creator_id': user_id, 'skill': skill} for user_id, skills in rows for skill in _parse_skills(skills)]
+        if skill_rows:
+            op.bulk_insert(creator_skills, skill_rows)
+
+    user_indexes = {i['name'] for i in inspector.get_indexes('users')}
+    if 'idx_users_directory' not in user_indexes:
+        op.create_index('idx_users_directory', 'users', ['role', 'is_active', 'domain', 'rating'], unique=False)
+    if 'idx_users_location' not in user_indexes:
+        # Rebuilt with text_pattern_ops on Postgres by 0010_users_location_pattern_ops
+        op.create_index('idx_users_location', 'users', [sa.text('lower(location)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_users_location', table_name='users')
+    op.drop_index('idx_users_directory', table_name='users')
+    op.drop_index(op.f('ix_creator_skills_creator_id'), table_name='creator_skills')
+    op.drop_table('creator_skills')
+    op.drop_index('idx_creator_stats_completed', table_name='creator_stats')
+    op.drop_table('creator_stats')
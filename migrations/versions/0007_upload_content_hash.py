@@ -0,0 +1,37 @@
+"""Content hashes for uploads
+
+Uploaded files are stored once per SHA-256 (app/storage.py); the indexed
+hash lets an upload of known content skip the storage backend. Rows
+saved before this revision keep their timestamped files and a NULL hash.
+
+Revision ID: 0007_upload_content_hash
+Revises: 0006_creator_directory
+Create Date: 2026-10-18 05:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_upload_content_hash'
+down_revision = '0006_creator_directory'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'content_hash' not in {c['name'] for c in inspector.get_columns('uploads')}:
+        with op.batch_alter_table('uploads') as batch_op:
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    if 'ix_uploads_content_hash' not in {i['name'] for i in inspector.get_indexes('uploads')}:
+        op.create_index('ix_uploads_content_hash', 'uploads', ['content_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_uploads_content_hash', table_name='uploads')
+    with op.batch_alter_table('uploads') as batch_op:
+        batch_op.drop_column('content_hash')
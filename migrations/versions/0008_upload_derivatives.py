@@ -0,0 +1,44 @@
+"""Resized copies of uploaded images
+
+upload_derivatives records the WebP and JPEG copies made of portfolio and
+profile images (app/thumbnails.py), one row per upload, format and width.
+
+Revision ID: 0008_upload_derivatives
+Revises: 0007_upload_content_hash
+Create Date: 2026-10-18 05:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_upload_derivatives'
+down_revision = '0007_upload_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'upload_derivatives' not in inspector.get_table_names():
+        op.create_table(
+            'upload_derivatives',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('upload_id', sa.Integer(), nullable=False),
+            sa.Column('format', sa.String(length=10), nullable=False),
+            sa.Column('width', sa.Integer(), nullable=False),
+            sa.Column('height', sa.Integer(), nullable=False),
+            sa.Column('file_path', sa.String(length=255), nullable=False),
+            sa.Column('file_size', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_upload_derivatives_upload', 'upload_derivatives',
+                        ['upload_id', 'format', 'width'], unique=True)
+
+
+def downgrade():
+    op.drop_index('idx_upload_derivatives_upload', table_name='upload_derivatives')
+    op.drop_table('upload_derivatives')
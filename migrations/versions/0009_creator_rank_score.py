@@ -0,0 +1,57 @@
+"""Indexed default ranking score for the creator directory
+
+creator_stats.rank_score holds each creator's Bayesian average rating
+(see app/creator_stats.py), kept current by the rating flush hook, so the
+directory's default order is an index scan instead of a score computed
+for every creator per request. Creators without a stats row get one.
+
+Revision ID: 0009_creator_rank_score
+Revises: 0008_upload_derivatives
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_creator_rank_score'
+down_revision = '0008_upload_derivatives'
+branch_labels = None
+depends_on = None
+
+# Same as app.creator_stats.PRIOR_RATING / PRIOR_REVIEWS at the time of writing
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'rank_score' not in {c['name'] for c in inspector.get_columns('creator_stats')}:
+        with op.batch_alter_table('creator_stats') as batch_op:
+            batch_op.add_column(sa.Column('rank_score', sa.Float(), nullable=False,
+                                          server_default=sa.text(str(PRIOR_RATING))))
+
+    op.execute("""
+        INSERT INTO creator_stats (creator_id, completed_projects, response_count, response_seconds_total, rank_score)
+        SELECT users.id, 0, 0, 0, {prior}
+        FROM users
+        WHERE users.role = 'creator'
+            AND users.id NOT IN (SELECT creator_id FROM creator_stats)
+    """.format(prior=PRIOR_RATING))
+    op.execute("""
+        UPDATE creator_stats SET rank_score = COALESCE(
+            (SELECT (rating_sum + {prior} * {reviews}) / (review_count + {reviews}.0)
+             FROM creator_ratings WHERE creator_ratings.creator_id = creator_stats.creator_id),
+            {prior})
+    """.format(prior=PRIOR_RATING, reviews=PRIOR_REVIEWS))
+
+    if 'idx_creator_stats_rank' not in {i['name'] for i in inspector.get_indexes('creator_stats')}:
+        op.create_index('idx_creator_stats_rank', 'creator_stats', ['rank_score', 'creator_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_creator_stats_rank', table_name='creator_stats')
+    with op.batch_alter_table('creator_stats') as batch_op:
+        batch_op.drop_column('rank_score')
@@ -0,0 +1,35 @@
+"""Location prefix index usable by LIKE on Postgres
+
+The creator directory filters on lower(location) LIKE 'prefix%'. Under a
+non-C collation (the default on most Postgres hosts) a plain btree can't
+serve that, so idx_users_location is rebuilt with text_pattern_ops.
+SQLite's LIKE never uses the index this way, so it is left as it is.
+
+Revision ID: 0010_users_location_pattern_ops
+Revises: 0009_creator_rank_score
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_users_location_pattern_ops'
+down_revision = '0009_creator_rank_score'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS idx_users_location')
+    op.execute('CREATE INDEX idx_users_location ON users (lower(location) text_pattern_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS idx_users_location')
+    op.create_index('idx_users_location', 'users', [sa.text('lower(location)')], unique=False)
@@ -4,6 +4,7 @@ Creates a fresh database without migration issues
 """
 import os
 from app import create_app, socketio, db
+from app.schema import reset_database
 from app.models import User
 from werkzeug.security import generate_password_hash
 
@@ -15,12 +16,9 @@ os.environ['FLASK_DEBUG'] = '1'
 app = create_app('default')
 
 with app.app_context():
-    # Drop all tables and recreate (fresh start)
-    print("🗑️  Dropping old tables...")
-    db.drop_all()
-    
-    print("📋 Creating fresh tables...")
-    db.create_all()
+    # Drop all tables and rebuild from migrations (fresh start)
+    print("🗑️  Dropping old tables and applying migrations...")
+    reset_database()
     
     # Create admin user
     print("👤 Creating admin user...")
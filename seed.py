@@ -4,6 +4,7 @@ Run this script after database initialization
 """
 
 from app import create_app, db
+from app.schema import reset_database
 from app.models import User, Project, Application, Package, Review, Transaction
 from datetime import datetime, timedelta
 import random
@@ -14,8 +15,7 @@ def seed_database():
     
     with app.app_context():
         print("Clearing existing data...")
-        db.drop_all()
-        db.create_all()
+        reset_database()
         
         print("Creating admin user...")
         admin = User(